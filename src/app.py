@@ -1,16 +1,48 @@
 from flask import Flask, request, jsonify, render_template
 import os
 import sys
+import threading
 import time
+from typing import Optional
 
 # Add project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.db.core import Database
+from src.db.limits import QueryHandle, QueryLimits
+from src.db.replication import Primary
 
 app = Flask(__name__, template_folder='web/templates')
-db = Database("db.json")
-db.load()
+# The database being served. Created from db.json on first use, so importers
+# that serve their own (src/replica.py, src/loadtest.py) never load it.
+db: Optional[Database] = None
+db_lock = threading.Lock()
+
+def env_query_limits() -> QueryLimits:
+    """Limits for every query, e.g. QUERY_TIMEOUT=5 QUERY_MAX_RESULT_ROWS=10000.
+
+    A request can tighten them with "limits" but not lift them.
+    """
+    return QueryLimits.from_dict({
+        name: os.environ[f"QUERY_{name.upper()}"]
+        for name in ("timeout", "max_scanned_rows", "max_result_rows", "max_result_bytes")
+        if os.environ.get(f"QUERY_{name.upper()}")
+    })
+
+def get_db() -> Database:
+    global db
+    with db_lock:
+        if db is None:
+            loaded = Database("db.json")
+            loaded.load()
+            loaded.query_limits = env_query_limits()
+            db = loaded
+        return db
+# Queries sent with a "query_id", so /api/query/<query_id>/cancel can stop them
+running_queries = {}
+running_queries_lock = threading.Lock()
+# Primary or Follower when replication is enabled (see src/replica.py)
+replication = None
 
 @app.route('/')
 def home():
@@ -18,7 +50,13 @@ def home():
 
 @app.route('/api/tables', methods=['GET'])
 def get_tables():
-    return jsonify(db.get_tables())
+    return jsonify(get_db().get_tables())
+
+@app.route('/api/replication', methods=['GET'])
+def replication_status():
+    if replication is None:
+        return jsonify({"error": "Replication is not enabled"}), 404
+    return jsonify(replication.status())
 
 @app.route('/api/query', methods=['POST'])
 def query():
@@ -26,19 +64,41 @@ def query():
     sql = data.get('query')
     if not sql:
         return jsonify({"error": "No query provided"}), 400
+    try:
+        limits = QueryLimits.from_dict(data.get('limits') or {})
+    except (AttributeError, ValueError) as e:
+        return jsonify({"error": f"Invalid limits: {e}"}), 400
+
+    query_id = data.get('query_id')
+    # Only cancellable queries get a handle; without one (and without limits)
+    # the query runs unguarded
+    handle = None
+    if query_id is not None:
+        handle = QueryHandle()
+        with running_queries_lock:
+            if query_id in running_queries:
+                return jsonify({"error": f"Query '{query_id}' is already running"}), 409
+            running_queries[query_id] = handle
     
+    db = get_db()
     start_time = time.time()
     try:
-        result = db.execute_query(sql)
+        try:
+            result = db.execute_query(sql, limits=limits, handle=handle, autocommit=True)
+        finally:
+            if query_id is not None:
+                with running_queries_lock:
+                    running_queries.pop(query_id, None)
         duration = time.time() - start_time
         
+        # Make committed writes durable, including those of a script that
+        # committed a transaction and then failed. Concurrent requests share
+        # one flush, and nothing is written while a transaction is still open.
+        db.sync()
+
         # If result is "Error: ...", return as bad request
         if isinstance(result, str) and result.startswith("Error:"):
              return jsonify({"error": result}), 400
-             
-        # Trigger save on write ops
-        if sql.upper().strip().startswith(('INSERT', 'UPDATE', 'DELETE', 'CREATE', 'DROP')):
-            db.save()
             
         # Metadata
         row_count = len(result) if isinstance(result, list) else 1
@@ -52,5 +112,19 @@ def query():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/query/<query_id>/cancel', methods=['POST'])
+def cancel_query(query_id):
+    with running_queries_lock:
+        handle = running_queries.get(query_id)
+    if handle is None:
+        return jsonify({"error": f"No running query '{query_id}'"}), 404
+    handle.cancel()
+    return jsonify({"cancelled": query_id})
+
 if __name__ == '__main__':
-    app.run(debug=True, port=3000)
+    # REPLICATION_PORT=7070 also streams committed writes to followers
+    replication_port = os.environ.get("REPLICATION_PORT")
+    if replication_port:
+        replication = Primary(get_db(), port=int(replication_port)).start()
+        print(f"Streaming replication on 127.0.0.1:{replication.address[1]}")
+    app.run(debug=True, port=3000, use_reloader=not replication_port)
@@ -1,12 +1,15 @@
 import cmd
 import shlex
+import signal
 import sys
 import os
+import threading
 
 # Add project root to sys.path to allow running as script
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.db.core import Database
+from src.db.limits import QueryHandle, QueryLimits
 
 class DatabaseShell(cmd.Cmd):
     intro = 'Welcome to the Pesapal RDBMS REPL. Type help or ? to list commands.\nType "exit" or "quit" to leave.'
@@ -16,6 +19,8 @@ class DatabaseShell(cmd.Cmd):
         super().__init__()
         self.db = Database(db_path)
         self.db.load()
+        # This session's own limits, on top of the database-wide ones (see do_limits)
+        self.limits = None
         print(f"Database loaded from {db_path}")
 
     def default(self, line):
@@ -30,11 +35,41 @@ class DatabaseShell(cmd.Cmd):
         try:
             # Debugging: print what we received
             # print(f"DEBUG: Processing '{line}'") 
-            result = self.db.execute_query(line)
+            # Ctrl-C cancels the running query instead of killing the shell
+            handle = QueryHandle()
+            previous = self._trap_interrupt(handle)
+            try:
+                result = self.db.execute_query(line, limits=self.limits, handle=handle)
+            finally:
+                if previous is not None:
+                    signal.signal(signal.SIGINT, previous)
             self._print_result(result)
         except Exception as e:
             print(f"Error: {e}")
 
+    def _trap_interrupt(self, handle):
+        """Route SIGINT to handle.cancel(); returns the handler to restore, if one was replaced."""
+        if threading.current_thread() is not threading.main_thread():
+            return None
+        return signal.signal(signal.SIGINT, lambda signum, frame: handle.cancel())
+
+    def do_limits(self, arg):
+        """Show or set this session's query limits, e.g. `limits timeout=5 max_result_rows=1000`; `limits off` clears them."""
+        try:
+            if arg.strip() == "off":
+                self.limits = None
+            elif arg.strip():
+                pairs = [item.split("=", 1) for item in shlex.split(arg)]
+                if any(len(pair) != 2 for pair in pairs):
+                    raise ValueError("Expected name=value pairs")
+                self.limits = QueryLimits.from_dict(dict(pairs))
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+        effective = self.db.query_limits.tighten(self.limits)
+        for name, value in vars(effective).items():
+            print(f"{name} = {'unlimited' if value is None else value}")
+
     def do_EOF(self, arg):
         """Handle EOF (Ctrl+D) to exit gracefully."""
         print() # Newline
@@ -57,6 +92,9 @@ class DatabaseShell(cmd.Cmd):
 
     def do_exit(self, arg):
         """Exit the REPL"""
+        if self.db.in_transaction:
+            print("Rolling back open transaction...")
+            self.db.execute_query("ROLLBACK")
         print("Saving database...")
         self.db.save()
         print("Goodbye.")
@@ -68,6 +106,9 @@ class DatabaseShell(cmd.Cmd):
 
     def do_save(self, arg):
         """Manually save the database to disk."""
+        if self.db.in_transaction:
+            print("Error: COMMIT or ROLLBACK the open transaction before saving.")
+            return
         self.db.save()
         print("Database saved.")
 
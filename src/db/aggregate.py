@@ -0,0 +1,120 @@
+import math
+from typing import Any, List
+
+AGGREGATE_FUNCTIONS = ("COUNT", "SUM", "AVG", "MIN", "MAX")
+
+def _is_integer(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def aggregate_values(func: str, values: List[Any]) -> Any:
+    """Pure-Python aggregate over the non-null `values` of a column.
+
+    SUM is exact: integers are summed as Python ints and anything with a
+    float in it goes through math.fsum, so the result doesn't depend on
+    summation order. This is the reference behaviour the vectorized backend
+    has to reproduce.
+    """
+    if func == "COUNT":
+        return len(values)
+    if not values:
+        return None
+    if func == "MIN":
+        return min(values)
+    if func == "MAX":
+        return max(values)
+    total = sum(values) if all(_is_integer(v) for v in values) else math.fsum(values)
+    if func == "SUM":
+        return total
+    if func == "AVG":
+        return total / len(values)
+    raise ValueError(f"Unknown aggregate: {func}")
+
+class RunningAggregate:
+    """Incrementally maintained aggregate that agrees with aggregate_values.
+
+    Integers are kept as an exact Python int. Every value is also added to a
+    list of non-overlapping float partials (Shewchuk's algorithm, as used by
+    math.fsum), so the float sum stays exact under both additions and
+    removals and math.fsum(partials) equals math.fsum(values).
+    MIN/MAX can grow on insert but can't shrink on delete; `exact` turns
+    False in that case and the owner must recompute.
+    """
+    def __init__(self, func: str):
+        self.func = func
+        self.count = 0
+        self.int_total = 0
+        self.non_int = 0
+        self.partials: List[float] = []
+        self.extreme: Any = None
+        self.exact = True
+
+    def _add_partial(self, x: float) -> None:
+        partials = self.partials
+        i = 0
+        for y in partials:
+            if abs(x) < abs(y):
+                x, y = y, x
+            hi = x + y
+            lo = y - (hi - x)
+            if lo:
+                partials[i] = lo
+                i += 1
+            x = hi
+        partials[i:] = [x]
+
+    def add(self, value: Any) -> None:
+        if value is None:
+            return
+        self.count += 1
+        if self.func in ("MIN", "MAX"):
+            if self.extreme is None or (value < self.extreme if self.func == "MIN" else value > self.extreme):
+                self.extreme = value
+            return
+        if self.func == "COUNT":
+            return
+        if _is_integer(value):
+            self.int_total += value
+        else:
+            self.non_int += 1
+        self._add_partial(float(value))
+
+    def remove(self, value: Any) -> None:
+        if value is None:
+            return
+        self.count -= 1
+        if self.func in ("MIN", "MAX"):
+            if value == self.extreme or self.count == 0:
+                self.exact = False
+            return
+        if self.func == "COUNT":
+            return
+        if _is_integer(value):
+            self.int_total -= value
+        else:
+            self.non_int -= 1
+        self._add_partial(-float(value))
+
+    def merge(self, other: 'RunningAggregate') -> None:
+        """Fold in an aggregate computed over a disjoint set of rows."""
+        self.count += other.count
+        self.int_total += other.int_total
+        self.non_int += other.non_int
+        for x in other.partials:
+            self._add_partial(x)
+        if other.extreme is not None and (
+                self.extreme is None or
+                (other.extreme < self.extreme if self.func == "MIN" else other.extreme > self.extreme)):
+            self.extreme = other.extreme
+        self.exact = self.exact and other.exact
+
+    def value(self) -> Any:
+        if self.func == "COUNT":
+            return self.count
+        if self.count == 0:
+            return None
+        if self.func in ("MIN", "MAX"):
+            return self.extreme
+        total = self.int_total if self.non_int == 0 else math.fsum(self.partials)
+        if self.func == "SUM":
+            return total
+        return total / self.count
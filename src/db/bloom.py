@@ -0,0 +1,39 @@
+import math
+from typing import Any, Iterable
+
+class BloomFilter:
+    """Bit-array set membership with false positives but no false negatives.
+
+    Keys are hashed with Python's hash(), so values that compare equal
+    (1, 1.0, True) land on the same bits, matching the join's == semantics.
+    """
+    def __init__(self, expected_items: int, bits_per_key: int = 10):
+        self.size = max(64, expected_items * bits_per_key)
+        # Optimal number of hash functions for the chosen density
+        self.hash_count = max(1, round(bits_per_key * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[Any], expected_items: int, bits_per_key: int = 10) -> 'BloomFilter':
+        bloom = cls(expected_items, bits_per_key)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key: Any):
+        # Double hashing: position_i = h1 + i * h2
+        h1 = hash(key)
+        h2 = hash((key, 0x5bd1e995)) | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: Any) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: Any) -> bool:
+        bits = self.bits
+        for pos in self._positions(key):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
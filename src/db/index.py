@@ -0,0 +1,51 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+class CoveringIndex:
+    """Hash index on `key_columns` whose entries also store the `include` columns.
+
+    Each entry is a tuple of the row's values for `columns` (keys first,
+    then included columns), so a query that filters on the full key and
+    only projects indexed columns can be answered without touching the rows.
+    """
+    def __init__(self, name: str, key_columns: List[str], include: Optional[List[str]] = None):
+        self.name = name
+        self.key_columns = list(key_columns)
+        self.include = [c for c in include or [] if c not in self.key_columns]
+        self.columns = self.key_columns + self.include
+        self.entries: Dict[Tuple[Any, ...], List[Tuple[Any, ...]]] = {}
+
+    def _key(self, row: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(row.get(c) for c in self.key_columns)
+
+    def add(self, row: Dict[str, Any]) -> None:
+        entry = tuple(row.get(c) for c in self.columns)
+        self.entries.setdefault(self._key(row), []).append(entry)
+
+    def remove(self, row: Dict[str, Any]) -> None:
+        key = self._key(row)
+        bucket = self.entries.get(key)
+        if not bucket:
+            return
+        bucket.remove(tuple(row.get(c) for c in self.columns))
+        if not bucket:
+            del self.entries[key]
+
+    def rebuild(self, rows: List[Dict[str, Any]]) -> None:
+        self.entries = {}
+        for row in rows:
+            self.add(row)
+
+    def covers(self, where: Dict[str, Any], projection: List[str]) -> bool:
+        """True if `where` pins the whole key and every projected column is stored."""
+        return set(where) == set(self.key_columns) and set(projection) <= set(self.columns)
+
+    def lookup(self, where: Dict[str, Any], projection: List[str]) -> List[Dict[str, Any]]:
+        try:
+            bucket = self.entries.get(tuple(where[c] for c in self.key_columns), [])
+        except TypeError:  # unhashable predicate value can't match anything
+            return []
+        positions = [(c, self.columns.index(c)) for c in projection]
+        return [{c: entry[i] for c, i in positions} for entry in bucket]
+
+    def definition(self) -> Dict[str, Any]:
+        return {"name": self.name, "columns": self.key_columns, "include": self.include}
@@ -0,0 +1,167 @@
+import itertools
+import json
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
+
+# Scan loops check the deadline and cancellation once per this many rows
+CHECK_INTERVAL = 1024
+
+class QueryAborted(ValueError):
+    """A query was stopped before finishing; its script is rolled back."""
+
+class QueryTimeout(QueryAborted):
+    pass
+
+class QueryCancelled(QueryAborted):
+    pass
+
+class QueryLimitExceeded(QueryAborted):
+    pass
+
+@dataclass
+class QueryLimits:
+    """Per-query resource limits; None means unlimited.
+
+    - timeout: seconds from the call to execute_query()
+    - max_scanned_rows: rows examined by scans, plus row pairs compared by joins
+    - max_result_rows / max_result_bytes: size of a SELECT result (bytes as JSON)
+    """
+    timeout: Optional[float] = None
+    max_scanned_rows: Optional[int] = None
+    max_result_rows: Optional[int] = None
+    max_result_bytes: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, values: Mapping[str, Any]) -> 'QueryLimits':
+        """Build limits from e.g. a JSON request body; unknown keys and bad values raise ValueError."""
+        known = {f.name: f for f in fields(cls)}
+        limits = cls()
+        for name, value in values.items():
+            if name not in known:
+                raise ValueError(f"Unknown query limit '{name}'")
+            if value is None:
+                continue
+            try:
+                value = float(value) if name == "timeout" else int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid value for query limit '{name}': {value!r}")
+            if value <= 0:
+                raise ValueError(f"Query limit '{name}' must be positive")
+            setattr(limits, name, value)
+        return limits
+
+    def tighten(self, other: Optional['QueryLimits']) -> 'QueryLimits':
+        """The stricter of two sets of limits, field by field.
+
+        Used to combine the database-wide limits with a connection's own, so a
+        connection can lower a global limit but never lift it.
+        """
+        if other is None:
+            return self
+        combined = {}
+        for f in fields(self):
+            mine, theirs = getattr(self, f.name), getattr(other, f.name)
+            combined[f.name] = theirs if mine is None else mine if theirs is None else min(mine, theirs)
+        return QueryLimits(**combined)
+
+    def any(self) -> bool:
+        return any(getattr(self, f.name) is not None for f in fields(self))
+
+class QueryHandle:
+    """Lets another thread (or a signal handler) cancel a running query."""
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+class QueryGuard:
+    """Enforces one query's limits; scan and join loops report progress to it."""
+    def __init__(self, limits: QueryLimits, handle: Optional[QueryHandle] = None):
+        self.limits = limits
+        self.handle = handle
+        self.deadline = time.monotonic() + limits.timeout if limits.timeout is not None else None
+        self.scanned = 0
+        # Result limits only apply while a SELECT is building its result, not
+        # to the internal queries that e.g. maintain views during a write
+        self.limit_results = False
+        self._measuring: Optional[List[Dict[str, Any]]] = None
+        self._measured = 0
+        self._result_bytes = 0
+
+    def check(self) -> None:
+        if self.handle is not None and self.handle.cancelled:
+            raise QueryCancelled("Query cancelled")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise QueryTimeout(f"Query timed out after {self.limits.timeout:g}s")
+
+    def scan(self, rows: int) -> None:
+        """Account for `rows` more rows examined, then check the deadline and cancellation."""
+        self.scanned += rows
+        limit = self.limits.max_scanned_rows
+        if limit is not None and self.scanned > limit:
+            raise QueryLimitExceeded(f"Query scanned more than {limit} rows")
+        self.check()
+
+    def iterate(self, rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        # Checked a chunk at a time and flattened by chain(), so the rows
+        # themselves don't pass through a Python generator
+        return itertools.chain.from_iterable(self._chunks(rows))
+
+    def _chunks(self, rows: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        it = iter(rows)
+        while True:
+            chunk = list(itertools.islice(it, CHECK_INTERVAL))
+            self.scan(len(chunk))
+            if not chunk:
+                return
+            yield chunk
+
+    def produced(self, rows: List[Dict[str, Any]], columns: Optional[List[str]] = None) -> None:
+        """Check a result being built; `rows` is the whole list so far.
+
+        `columns` names the columns the result will be projected to, so rows
+        that are still wider (e.g. joined rows) are measured as they'll be returned.
+        """
+        if not self.limit_results:
+            return
+        limit = self.limits.max_result_rows
+        if limit is not None and len(rows) > limit:
+            raise QueryLimitExceeded(f"Query result exceeds {limit} rows")
+        limit = self.limits.max_result_bytes
+        if limit is not None:
+            if rows is not self._measuring:
+                # A new list (e.g. the projection of the joined rows): start over
+                self._measuring, self._measured, self._result_bytes = rows, 0, 0
+            project = columns is not None and "*" not in columns
+            for row in rows[self._measured:]:
+                if project:
+                    row = {k: v for k, v in row.items() if k in columns}
+                self._result_bytes += len(json.dumps(row, default=str))
+            self._measured = len(rows)
+            if self._result_bytes > limit:
+                raise QueryLimitExceeded(f"Query result exceeds {limit} bytes")
+
+_active: ContextVar[Optional[QueryGuard]] = ContextVar("active_query_guard", default=None)
+
+def current_guard() -> Optional[QueryGuard]:
+    """The guard of the query running in this thread, if it has limits or a handle."""
+    return _active.get()
+
+def guarded(rows: Iterable[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
+    """`rows`, checked against the running query's limits as they are consumed."""
+    guard = _active.get()
+    return rows if guard is None else guard.iterate(rows)
+
+def activate(guard: Optional[QueryGuard]) -> Any:
+    return _active.set(guard)
+
+def deactivate(token: Any) -> None:
+    _active.reset(token)
@@ -0,0 +1,657 @@
+import json
+import os
+import struct
+import weakref
+import zlib
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from . import table as table_module
+from .table import Column, ColumnType, StringDictionary, Table, UndoLogger
+from .index import CoveringIndex
+from .limits import guarded
+
+PAGE_SIZE = 8192
+# Every page starts with the byte length of its JSON payload
+_HEADER = struct.Struct(">I")
+
+class _Frame:
+    """One page held in memory: its rows as dicts, and whether they differ from disk."""
+    __slots__ = ("owner", "page_id", "rows", "dirty")
+
+    def __init__(self, owner: 'PagedRows', page_id: int, rows: List[Dict[str, Any]], dirty: bool):
+        self.owner = owner
+        self.page_id = page_id
+        self.rows = rows
+        self.dirty = dirty
+
+class BufferPool:
+    """A fixed number of page frames shared by every paged table of a Database.
+
+    Pages are fetched on demand and evicted least-recently-used first; a
+    dirty page is written back to its table's data file when it is evicted
+    (or on flush()). The budget is in bytes of page data, so it bounds how
+    much of the tables is resident regardless of their total size.
+    """
+    def __init__(self, capacity_bytes: int, page_size: int = PAGE_SIZE):
+        self.page_size = page_size
+        self.capacity = max(2, capacity_bytes // page_size)
+        self._frames: 'OrderedDict[Tuple[PagedRows, int], _Frame]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writebacks = 0
+
+    def fetch(self, owner: 'PagedRows', page_id: int) -> _Frame:
+        key = (owner, page_id)
+        frame = self._frames.get(key)
+        if frame is not None:
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return frame
+        self.misses += 1
+        frame = _Frame(owner, page_id, owner._read_page(page_id), dirty=False)
+        self.admit(frame)
+        return frame
+
+    def peek(self, owner: 'PagedRows', page_id: int) -> Optional[_Frame]:
+        """The frame for a page if it is resident, without counting as a use."""
+        return self._frames.get((owner, page_id))
+
+    def admit(self, frame: _Frame, cold: bool = False) -> None:
+        """Add a frame (most recently used, or least if `cold`) and evict down to capacity."""
+        key = (frame.owner, frame.page_id)
+        self._frames[key] = frame
+        if cold:
+            self._frames.move_to_end(key, last=False)
+        frame.owner._register(frame)
+        while len(self._frames) > self.capacity:
+            _, victim = self._frames.popitem(last=False)
+            self.evictions += 1
+            self._write_back(victim)
+            victim.owner._forget(victim)
+
+    def rekey(self, frame: _Frame, page_id: int) -> None:
+        """Move a resident frame to another page id of the same owner."""
+        owner = frame.owner
+        del self._frames[(owner, frame.page_id)]
+        owner._forget(frame)
+        frame.page_id = page_id
+        frame.dirty = True
+        self._frames[(owner, page_id)] = frame
+        owner._register(frame)
+
+    def discard(self, owner: 'PagedRows', page_id: int) -> None:
+        """Drop a page's frame without writing it back (the page is being reused)."""
+        frame = self._frames.pop((owner, page_id), None)
+        if frame is not None:
+            owner._forget(frame)
+
+    def release(self, owner: 'PagedRows') -> None:
+        """Drop every frame of `owner` without writing it back (its file is being closed)."""
+        for key in [key for key in self._frames if key[0] is owner]:
+            del self._frames[key]
+
+    def flush(self, owner: Optional['PagedRows'] = None) -> None:
+        """Write back every dirty frame (of `owner`, or of all tables)."""
+        for frame in list(self._frames.values()):
+            if owner is None or frame.owner is owner:
+                self._write_back(frame)
+
+    def _write_back(self, frame: _Frame) -> None:
+        if frame.dirty:
+            frame.owner._write_page(frame.page_id, frame.rows)
+            frame.dirty = False
+            self.writebacks += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "page_size": self.page_size,
+            "capacity_pages": self.capacity,
+            "resident_pages": len(self._frames),
+            "dirty_pages": sum(1 for f in self._frames.values() if f.dirty),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "writebacks": self.writebacks,
+        }
+
+class _Checkpoint:
+    """The page list at some point in time, for rolling a PagedRows back to it."""
+    def __init__(self, pages: List[List[int]], length: int):
+        self.pages = [list(entry) for entry in pages]
+        self.length = length
+        self.ids = frozenset(entry[0] for entry in pages)
+
+class PagedRows:
+    """List-like sequence of rows stored in fixed-size pages of one data file.
+
+    `_pages` lists the pages in row order as [page id, row count, payload
+    bytes]; page ids are slots in the file. Only pages the buffer pool holds
+    are in memory, so iterating streams through the file.
+
+    Pages are copy-on-write with respect to the last saved catalog and to
+    live checkpoints: the first change to such a page moves its rows to a
+    fresh page id and leaves the old page untouched. Saving therefore never
+    overwrites data the previous catalog points at, and rolling back to a
+    checkpoint is just reinstating its page list.
+    """
+    def __init__(self, path: str, pool: BufferPool, encode: Callable[[Dict[str, Any]], bytes],
+                 decode: Callable[[List[Any]], Dict[str, Any]], pages: Optional[List[List[int]]] = None,
+                 next_page: int = 0):
+        self.path = path
+        self.pool = pool
+        self._encode = encode
+        self._decode = decode
+        self._file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        # Closes the file when this object is collected, if close() didn't already
+        self._closer = weakref.finalize(self, self._file.close)
+        self._pages: List[List[int]] = [list(entry) for entry in pages or []]
+        self._length = sum(entry[1] for entry in self._pages)
+        self._starts: Optional[List[int]] = None
+        self._next_page = max([next_page, *(entry[0] + 1 for entry in self._pages)])
+        self._free: List[int] = []
+        # id(row) -> page id, for rows of resident pages
+        self._row_page: Dict[int, int] = {}
+        self._checkpoints: 'weakref.WeakSet[_Checkpoint]' = weakref.WeakSet()
+        # save number -> page ids its catalog refers to
+        self._pinned: Dict[int, Set[int]] = {0: {entry[0] for entry in self._pages}}
+
+    # --- page I/O, called by the buffer pool ---
+
+    def _read_page(self, page_id: int) -> List[Dict[str, Any]]:
+        self._file.seek(page_id * self.pool.page_size)
+        data = self._file.read(self.pool.page_size)
+        (size,) = _HEADER.unpack_from(data)
+        return [self._decode(values) for values in json.loads(data[_HEADER.size:_HEADER.size + size])]
+
+    def _write_page(self, page_id: int, rows: List[Dict[str, Any]]) -> None:
+        payload = b"[" + b",".join(self._encode(row) for row in rows) + b"]"
+        page = _HEADER.pack(len(payload)) + payload
+        self._file.seek(page_id * self.pool.page_size)
+        self._file.write(page.ljust(self.pool.page_size, b"\0"))
+
+    def _register(self, frame: _Frame) -> None:
+        for row in frame.rows:
+            self._row_page[id(row)] = frame.page_id
+
+    def _forget(self, frame: _Frame) -> None:
+        for row in frame.rows:
+            if self._row_page.get(id(row)) == frame.page_id:
+                del self._row_page[id(row)]
+
+    # --- sequence protocol ---
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bool__(self) -> bool:
+        return self._length > 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for page_id, _, _ in list(self._pages):
+            # Copy: the caller may evict or change this page before we're done with it
+            yield from list(self.pool.fetch(self, page_id).rows)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("row index out of range")
+        if self._starts is None:
+            starts, total = [], 0
+            for entry in self._pages:
+                starts.append(total)
+                total += entry[1]
+            self._starts = starts
+        pos = bisect_right(self._starts, index) - 1
+        return self.pool.fetch(self, self._pages[pos][0]).rows[index - self._starts[pos]]
+
+    def append(self, row: Dict[str, Any]) -> None:
+        size = len(self._encode(row)) + 1
+        if not self._fits(size):
+            raise ValueError(f"Row is too large for a {self.pool.page_size}-byte page")
+        if self._pages and self._fits(self._pages[-1][2] + size):
+            frame = self._writable(len(self._pages) - 1)
+            entry = self._pages[-1]
+        else:
+            entry = [self._allocate(), 0, 0]
+            self._pages.append(entry)
+            frame = _Frame(self, entry[0], [], dirty=True)
+            self.pool.admit(frame)
+        frame.rows.append(row)
+        self._row_page[id(row)] = frame.page_id
+        entry[1] += 1
+        entry[2] += size
+        self._length += 1
+        self._starts = None
+
+    def pop(self) -> Dict[str, Any]:
+        if not self._pages:
+            raise IndexError("pop from empty table")
+        frame = self._writable(len(self._pages) - 1)
+        row = frame.rows.pop()
+        self._row_page.pop(id(row), None)
+        entry = self._pages[-1]
+        entry[1] -= 1
+        entry[2] -= len(self._encode(row)) + 1
+        if not entry[1]:
+            self._pages.pop()
+        self._length -= 1
+        self._starts = None
+        return row
+
+    def clear(self) -> None:
+        self._pages = []
+        self._length = 0
+        self._starts = None
+
+    def extend(self, rows: Any) -> None:
+        for row in rows:
+            self.append(row)
+
+    # --- bulk changes by row ---
+
+    def modify(self, rows: List[Dict[str, Any]], change: Callable[[Dict[str, Any]], None]) -> None:
+        """Apply `change` to the stored copy of each of `rows` (e.g. from an earlier select)."""
+        # Back to front: a page that overflows is split into pages after it
+        for pos, slots in sorted(self._locate(rows).items(), reverse=True):
+            frame = self._writable(pos)
+            for slot in slots:
+                change(frame.rows[slot])
+            self._repack(pos, frame)
+
+    def remove(self, rows: List[Dict[str, Any]]) -> List[Tuple[int, Dict[str, Any]]]:
+        """Delete the stored copy of each of `rows`.
+
+        Returns the (old position, stored row) pairs that were removed, in
+        position order, as Table._unindex() expects.
+        """
+        starts, total = [], 0
+        for entry in self._pages:
+            starts.append(total)
+            total += entry[1]
+        removed = []
+        emptied = []
+        for pos, slots in self._locate(rows).items():
+            frame = self._writable(pos)
+            drop = set(slots)
+            for slot in drop:
+                self._row_page.pop(id(frame.rows[slot]), None)
+                removed.append((starts[pos] + slot, frame.rows[slot]))
+            frame.rows = [row for slot, row in enumerate(frame.rows) if slot not in drop]
+            self._length -= len(drop)
+            self._repack(pos, frame)
+            if not frame.rows:
+                emptied.append(pos)
+        for pos in sorted(emptied, reverse=True):
+            del self._pages[pos]
+        self._starts = None
+        removed.sort(key=lambda pair: pair[0])
+        return removed
+
+    def _locate(self, rows: List[Dict[str, Any]]) -> Dict[int, List[int]]:
+        """Page position -> slots holding `rows`.
+
+        Rows whose page is still resident are found by identity. A row whose
+        page was evicted since it was read is a stale copy, so it is matched
+        by value instead (each match claims one stored row).
+        """
+        positions = {entry[0]: pos for pos, entry in enumerate(self._pages)}
+        found: Dict[int, Set[int]] = {}
+        by_page: Dict[int, Set[int]] = {}
+        missing = []
+        for row in rows:
+            page_id = self._row_page.get(id(row))
+            if page_id in positions:
+                by_page.setdefault(page_id, set()).add(id(row))
+            else:
+                missing.append(row)
+        for page_id, wanted in by_page.items():
+            frame = self.pool.peek(self, page_id)
+            if frame is None:
+                missing.extend(row for row in rows if id(row) in wanted)
+                continue
+            slots = {slot for slot, row in enumerate(frame.rows) if id(row) in wanted}
+            found[positions[page_id]] = slots
+        if missing:
+            wanted_values: Dict[Tuple[Any, ...], int] = {}
+            for row in missing:
+                key = tuple(sorted(row.items()))
+                wanted_values[key] = wanted_values.get(key, 0) + 1
+            for pos, (page_id, _, _) in enumerate(list(self._pages)):
+                if not wanted_values:
+                    break
+                taken = found.get(pos, set())
+                for slot, row in enumerate(self.pool.fetch(self, page_id).rows):
+                    key = tuple(sorted(row.items()))
+                    if slot not in taken and wanted_values.get(key):
+                        wanted_values[key] -= 1
+                        if not wanted_values[key]:
+                            del wanted_values[key]
+                        found.setdefault(pos, set()).add(slot)
+        return {pos: sorted(slots) for pos, slots in found.items()}
+
+    def _repack(self, pos: int, frame: _Frame) -> None:
+        """Recount a changed page; if it overflowed, split it into evenly filled pages."""
+        sizes = [len(self._encode(row)) + 1 for row in frame.rows]
+        if any(not self._fits(size) for size in sizes):
+            raise ValueError(f"Row is too large for a {self.pool.page_size}-byte page")
+        total = sum(sizes)
+        self._starts = None
+        if self._fits(total):
+            self._pages[pos][1:] = [len(sizes), total]
+            return
+        # Like a B-tree split: leave every page with room to grow, instead of
+        # a full page followed by one holding the few rows that spilled over
+        usable = self.pool.page_size - _HEADER.size - 1
+        target = total / (total // usable + 1)
+        chunks: List[Tuple[int, int]] = []  # (rows, bytes)
+        count, used = 0, 0
+        for size in sizes:
+            if count and (used + size > target or not self._fits(used + size)):
+                chunks.append((count, used))
+                count, used = 0, 0
+            count += 1
+            used += size
+        chunks.append((count, used))
+        rows = frame.rows
+        frame.rows = rows[:chunks[0][0]]
+        self._pages[pos][1:] = list(chunks[0])
+        start = chunks[0][0]
+        for offset, (count, used) in enumerate(chunks[1:], 1):
+            self._add_page(pos + offset, rows[start:start + count], used)
+            start += count
+
+    def _add_page(self, pos: int, rows: List[Dict[str, Any]], used: int) -> None:
+        page_id = self._allocate()
+        self._pages.insert(pos, [page_id, len(rows), used])
+        self.pool.admit(_Frame(self, page_id, rows, dirty=True))
+
+    def _fits(self, used: int) -> bool:
+        # used counts each row plus its separator; add the brackets and header
+        return used + 1 + _HEADER.size <= self.pool.page_size
+
+    # --- copy-on-write ---
+
+    def _frozen(self, page_id: int) -> bool:
+        if any(page_id in pinned for pinned in self._pinned.values()):
+            return True
+        return any(page_id in checkpoint.ids for checkpoint in self._checkpoints)
+
+    def _writable(self, pos: int) -> _Frame:
+        """The frame of the pos-th page, relocated first if an older state still refers to it."""
+        entry = self._pages[pos]
+        frame = self.pool.fetch(self, entry[0])
+        if self._frozen(entry[0]):
+            old_id = entry[0]
+            entry[0] = self._allocate()
+            preserved = _Frame(self, old_id, [dict(row) for row in frame.rows], frame.dirty)
+            self.pool.rekey(frame, entry[0])
+            # The untouched original stays behind under the old id; it's only
+            # needed again on rollback, so it is the first to be evicted
+            self.pool.admit(preserved, cold=True)
+        frame.dirty = True
+        return frame
+
+    def _allocate(self) -> int:
+        if not self._free and self._next_page >= 2 * len(self._pages) + 16:
+            self._collect()
+        if self._free:
+            page_id = self._free.pop()
+        else:
+            page_id = self._next_page
+            self._next_page += 1
+        self.pool.discard(self, page_id)
+        return page_id
+
+    def _collect(self) -> None:
+        """Find page ids nothing refers to any more so they can be reused."""
+        in_use = {entry[0] for entry in self._pages}
+        for pinned in self._pinned.values():
+            in_use |= pinned
+        for checkpoint in self._checkpoints:
+            in_use |= checkpoint.ids
+        self._free = [page_id for page_id in range(self._next_page - 1, -1, -1) if page_id not in in_use]
+
+    def checkpoint(self) -> _Checkpoint:
+        """Remember the current rows; pages are preserved while the result is alive."""
+        checkpoint = _Checkpoint(self._pages, self._length)
+        self._checkpoints.add(checkpoint)
+        return checkpoint
+
+    def rollback(self, checkpoint: _Checkpoint) -> None:
+        self._pages = [list(entry) for entry in checkpoint.pages]
+        self._length = checkpoint.length
+        self._starts = None
+
+    # --- persistence ---
+
+    def pin(self, save: int, durable: int) -> None:
+        """Keep the current pages intact for catalog `save`.
+
+        Pins of catalogs older than the last durable one (`durable`) are no
+        longer needed: a newer catalog has already replaced them on disk.
+        """
+        self._pinned = {n: ids for n, ids in self._pinned.items() if n >= durable}
+        self._pinned[save] = {entry[0] for entry in self._pages}
+
+    def flush(self) -> None:
+        self.pool.flush(self)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def state(self) -> Dict[str, Any]:
+        return {"page_size": self.pool.page_size, "next_page": self._next_page,
+                "list": [list(entry) for entry in self._pages]}
+
+    def close(self) -> None:
+        """Forget the resident pages, unsaved changes included, and close the data file."""
+        self.pool.release(self)
+        self._row_page = {}
+        self._closer()
+
+class PagedTable(Table):
+    """A Table whose rows live in a page file behind the shared buffer pool.
+
+    Behaves like Table; rows are fetched page by page on demand. Rows handed
+    out by select() are the stored objects while their page is resident, and
+    update()/delete() fall back to matching by value once it has been evicted.
+    """
+    # Pages store dictionary codes, so the dictionaries can only ever grow
+    _compact_dictionaries = False
+
+    def __init__(self, name: str, columns: List[Column], pool: BufferPool, directory: str,
+                 file_name: Optional[str] = None, pages: Optional[Dict[str, Any]] = None):
+        self.file_name = file_name or f"{name}.{next(table_module._version_counter)}.pages"
+        pages = pages or {}
+        if pages.get("page_size", pool.page_size) != pool.page_size:
+            raise ValueError(f"Table '{name}' was written with {pages['page_size']}-byte pages, "
+                             f"but the buffer pool uses {pool.page_size}")
+        super().__init__(name, columns)
+        self._paged = PagedRows(os.path.join(directory, self.file_name), pool, self._encode_row,
+                                self._decode_row, pages.get("list"), pages.get("next_page", 0))
+
+    @property
+    def rows(self) -> PagedRows:
+        return self._paged
+
+    @rows.setter
+    def rows(self, rows: List[Dict[str, Any]]) -> None:
+        if "_paged" not in self.__dict__:
+            return  # Table.__init__ starting out empty; the pages come next
+        rows = list(rows)  # may be iterating self._paged
+        self._paged.clear()
+        self._paged.extend(rows)
+
+    def _encode_row(self, row: Dict[str, Any]) -> bytes:
+        return json.dumps(self._compiled.encode(self, row), separators=(',', ':')).encode("utf-8")
+
+    def _decode_row(self, values: List[Any]) -> Dict[str, Any]:
+        return self._compiled.decode(self, values)
+
+    def select(self, where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        if not where:
+            # Reading every page can take a while; stay interruptible
+            return list(guarded(self._paged))
+        return super().select(where)
+
+    def _vectorizable(self, col: str) -> bool:
+        # Column buffers would pin a copy of the whole column in memory
+        return False
+
+    def update(self, rows: List[Dict[str, Any]], updates: Dict[str, Any],
+               log_undo: Optional[UndoLogger] = None) -> int:
+        updates = self._compiled.check_update(self, updates, rows)
+        if log_undo is not None and rows:
+            checkpoint = self._paged.checkpoint()
+            keys_changed = self._touches_keys(updates)
+            log_undo(lambda: self._rollback_pages(checkpoint, keys_changed))
+        indexes = list(self._secondary_indexes.values())
+
+        def change(row: Dict[str, Any]) -> None:
+            for index in indexes:
+                index.remove(row)
+            row.update(updates)
+            for index in indexes:
+                index.add(row)
+
+        self._paged.modify(rows, change)
+        # Keep the caller's copies in step too, as Table.update would
+        for row in rows:
+            row.update(updates)
+        if rows:
+            if self._touches_keys(updates):
+                self.rebuild_indexes()
+            self.touch()
+        return len(rows)
+
+    def delete(self, rows: List[Dict[str, Any]], log_undo: Optional[UndoLogger] = None) -> int:
+        if not rows:
+            return 0
+        checkpoint = self._paged.checkpoint() if log_undo is not None else None
+        removed = self._paged.remove(rows)
+        if removed:
+            # Shift the key index positions instead of rebuilding, which would read every page
+            self._unindex(removed)
+        if log_undo is not None:
+            log_undo(lambda: self._undo_remove(checkpoint, removed))
+        self.touch()
+        return len(removed)
+
+    def _undo_remove(self, checkpoint: Any, removed: List[Tuple[int, Dict[str, Any]]]) -> None:
+        self._paged.rollback(checkpoint)
+        if removed:
+            self._reindex(removed)
+        self.touch()
+
+    def _rollback_pages(self, checkpoint: Any, keys_changed: bool) -> None:
+        """Undo for update()/delete(): reinstate the page list of `checkpoint` and fix the indexes."""
+        self._paged.rollback(checkpoint)
+        if keys_changed:
+            self.rebuild_indexes()
+        else:
+            for index in self._secondary_indexes.values():
+                index.rebuild(self._paged)
+        self.touch()
+
+    def close(self) -> None:
+        """Release the page file; the table can't be used afterwards."""
+        self._paged.close()
+
+    def snapshot(self) -> Tuple[Any, Dict[Any, int], Dict[str, Dict[Any, int]]]:
+        """A page-list checkpoint plus index copies; no rows are copied."""
+        return (
+            self._paged.checkpoint(),
+            dict(self._primary_key_index),
+            {col: dict(index) for col, index in self._unique_indices.items()}
+        )
+
+    def restore(self, state: Tuple[Any, Dict[Any, int], Dict[str, Dict[Any, int]]]) -> None:
+        checkpoint, self._primary_key_index, self._unique_indices = state
+        self._paged.rollback(checkpoint)
+        for index in self._secondary_indexes.values():
+            index.rebuild(self._paged)
+        self.touch()
+
+    def catalog_entry(self) -> Dict[str, Any]:
+        """Like to_dict(), but the rows stay in the page file and only the page list is recorded."""
+        return {
+            "name": self.name,
+            "columns": [
+                {"name": c.name, "type": c.col_type.value, "is_primary": c.is_primary,
+                 "is_unique": c.is_unique, "nullable": c.nullable}
+                for c in self.columns.values()
+            ],
+            "version": self.version,
+            "secondary_indexes": [index.definition() for index in self._secondary_indexes.values()],
+            "dictionaries": {col: list(d.values) for col, d in self._dictionaries.items()},
+            "file": self.file_name,
+            "pages": self._paged.state(),
+            "indexes": self.indexes_to_dict(),
+        }
+
+    def indexes_to_dict(self) -> Dict[str, Any]:
+        """Serialize the indexes, tagged with the table version they describe.
+
+        Unlike in-memory tables, whose rows are at hand when they load, a paged
+        table would have to read every page to rebuild its indexes, so they
+        are saved alongside the page list.
+        """
+        entries = {
+            "primary": list(self._primary_key_index.items()),
+            "unique": {col: list(index.items()) for col, index in self._unique_indices.items()},
+            "secondary": {name: list(index.entries.items()) for name, index in self._secondary_indexes.items()}
+        }
+        return {
+            "version": self.version,
+            "row_count": len(self.rows),
+            "checksum": _index_checksum(entries),
+            **entries
+        }
+
+    def _load_indexes(self, data: Optional[Dict[str, Any]]) -> bool:
+        """Adopt persisted indexes if they match this table; return False if they must be rebuilt."""
+        if not data:
+            return False
+        try:
+            entries = {"primary": data["primary"], "unique": data["unique"], "secondary": data["secondary"]}
+            if (data["version"] != self.version or data["row_count"] != len(self.rows)
+                    or data["checksum"] != _index_checksum(entries)
+                    or set(entries["unique"]) != set(self._unique_indices)
+                    or set(entries["secondary"]) != set(self._secondary_indexes)):
+                return False
+            self._primary_key_index = dict(entries["primary"])
+            self._unique_indices = {col: dict(pairs) for col, pairs in entries["unique"].items()}
+            for name, pairs in entries["secondary"].items():
+                self._secondary_indexes[name].entries = {
+                    tuple(key): [tuple(entry) for entry in bucket] for key, bucket in pairs
+                }
+        except (KeyError, TypeError, ValueError):
+            return False
+        return True
+
+    @staticmethod
+    def from_catalog(data: Dict[str, Any], pool: BufferPool, directory: str) -> 'PagedTable':
+        cols = [
+            Column(c["name"], ColumnType(c["type"]), c["is_primary"], c["is_unique"], c.get("nullable", True))
+            for c in data["columns"]
+        ]
+        table = PagedTable(data["name"], cols, pool, directory, data["file"], data["pages"])
+        for col, values in data.get("dictionaries", {}).items():
+            if col not in table._dictionaries:
+                # Pages hold codes for this column, but the schema now stores it as plain strings
+                raise ValueError(f"Table '{table.name}' stores key column '{col}' in an unsupported older format")
+            table._dictionaries[col] = StringDictionary(values)
+        for index in data.get("secondary_indexes", []):
+            table._secondary_indexes[index["name"]] = CoveringIndex(index["name"], index["columns"], index["include"])
+        table.version = data["version"]
+        table_module._reserve_version(table.version)
+        if not table._load_indexes(data.get("indexes")):
+            table.rebuild_indexes()
+        return table
+
+def _index_checksum(entries: Dict[str, Any]) -> int:
+    return zlib.crc32(json.dumps(entries, separators=(',', ':')).encode())
@@ -0,0 +1,290 @@
+import json
+import multiprocessing
+import os
+import zlib
+from dataclasses import replace
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from . import table as table_module
+from .table import Column, ColumnType, Table
+from .transaction import Transaction
+from .aggregate import RunningAggregate
+from .storage import atomic_write
+from src.parser.commands import SelectCommand
+
+UndoLogger = Callable[[Callable[[], None]], None]
+
+def partition_of(value: Any, partitions: int) -> int:
+    """Shard number for a partition-key value.
+
+    hash() of a str is salted per process, so strings use CRC32 to stay
+    stable across restarts. Numbers hash the same everywhere, and 1, 1.0
+    and True land on the same shard, matching the == used by WHERE.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return zlib.crc32(value.encode("utf-8")) % partitions
+    return hash(value) % partitions
+
+class ShardWorker:
+    """Runs inside a worker process and holds one shard of every partitioned table.
+
+    The shards live in a private Database, so filtering, joins, index-only
+    scans and aggregates run through the same code as unpartitioned tables.
+    Writes go into a worker-side transaction that the coordinator rolls back
+    to savepoints (its undo entries) or commits.
+    """
+    def __init__(self):
+        from .core import Database
+        self.db = Database(":memory:")
+
+    def execute(self, method: str, command: Any) -> Tuple[Optional[int], Any]:
+        """Run a write (`Database` method name + command). Returns (savepoint, result)."""
+        db = self.db
+        if db._txn is None:
+            db._txn = Transaction(explicit=True)
+        txn = db._txn
+        savepoint = txn.savepoint()
+        try:
+            result = getattr(db, method)(command)
+        except Exception:
+            txn.rollback(savepoint)
+            raise
+        return (savepoint if txn.savepoint() > savepoint else None), result
+
+    def rollback_to(self, savepoint: int) -> None:
+        if self.db._txn is not None:
+            self.db._txn.rollback(savepoint)
+
+    def commit(self) -> None:
+        self.db._txn = None
+
+    def select(self, cmd: SelectCommand) -> List[Dict[str, Any]]:
+        return self.db._exec_select(cmd)
+
+    def aggregate(self, cmd: SelectCommand) -> List[RunningAggregate]:
+        rows = self.db._exec_select(replace(cmd, columns=["*"], aggregates=None))
+        states = []
+        for agg in cmd.aggregates:
+            state = RunningAggregate(agg["func"])
+            for row in rows:
+                state.add(1 if agg["column"] == "*" else row.get(agg["column"]))
+            states.append(state)
+        return states
+
+    def count(self, name: str) -> int:
+        return len(self.db.tables[name].rows)
+
+    def dump(self, name: str) -> Dict[str, Any]:
+        return self.db.tables[name].to_dict()
+
+    def restore(self, data: Dict[str, Any]) -> None:
+        self.db.tables[data["name"]] = Table.from_dict(data)
+
+    def save(self, name: str, path: str) -> None:
+        atomic_write(path, json.dumps(self.db.tables[name].to_dict(), separators=(',', ':')))
+
+    def load(self, path: str) -> None:
+        with open(path, 'r') as f:
+            self.restore(json.load(f))
+
+    def reset(self) -> None:
+        self.db.tables = {}
+        self.db._txn = None
+
+def _worker_main(conn: Any) -> None:
+    worker = ShardWorker()
+    while True:
+        try:
+            op, args = conn.recv()
+        except EOFError:
+            return
+        if op == "stop":
+            return
+        try:
+            conn.send(("ok", getattr(worker, op)(*args)))
+        except Exception as e:
+            conn.send((type(e).__name__, str(e)))
+
+def _unwrap(reply: Tuple[str, Any]) -> Any:
+    status, payload = reply
+    if status == "ok":
+        return payload
+    # Surface worker errors the way local execution would
+    raise (TypeError if status == "TypeError" else ValueError)(payload)
+
+class ShardPool:
+    """N worker processes; worker i holds shard i of every table partitioned N ways."""
+    def __init__(self, size: int):
+        self.size = size
+        # Prefer fork: spawn re-imports the __main__ module in every worker,
+        # which re-runs scripts like app.py that open a database at import time.
+        # Workers only use a fresh Database, none of the parent's locks.
+        methods = multiprocessing.get_all_start_methods()
+        ctx = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+        self._conns = []
+        self._procs = []
+        for i in range(size):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_worker_main, args=(child,), name=f"db-shard-{i}", daemon=True)
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+        # Shards with an open worker-side transaction
+        self.open_shards = set()
+
+    def scatter(self, requests: List[Tuple[int, str, tuple]]) -> List[Tuple[str, Any]]:
+        """Send every request before reading any reply, so shards work in parallel.
+
+        Returns the raw (status, payload) replies in request order.
+        """
+        for shard, op, args in requests:
+            self._conns[shard].send((op, args))
+        return [self._conns[shard].recv() for shard, _, _ in requests]
+
+    def call(self, shard: int, op: str, *args: Any) -> Any:
+        return _unwrap(self.scatter([(shard, op, args)])[0])
+
+    def broadcast(self, op: str, *args: Any) -> List[Any]:
+        return [_unwrap(r) for r in self.scatter([(i, op, args) for i in range(self.size)])]
+
+    def commit(self) -> None:
+        if self.open_shards:
+            for reply in self.scatter([(i, "commit", ()) for i in sorted(self.open_shards)]):
+                _unwrap(reply)
+            self.open_shards.clear()
+
+    def close(self) -> None:
+        for conn in self._conns:
+            try:
+                conn.send(("stop", ()))
+            except OSError:
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+
+class PartitionedTable:
+    """Coordinator-side handle for a table hash-partitioned across a ShardPool.
+
+    Reads and writes whose WHERE pins the partition key go to one shard;
+    everything else is scattered to all shards and the results gathered.
+    PRIMARY KEY/UNIQUE are enforced per shard, which is why they are only
+    allowed on the partition key.
+    """
+    def __init__(self, name: str, columns: List[Column], partition_key: str, pool: ShardPool):
+        self.name = name
+        self.columns = {c.name: c for c in columns}
+        self.partition_key = partition_key
+        self.pool = pool
+        self.version = next(table_module._version_counter)
+
+    @property
+    def partitions(self) -> int:
+        return self.pool.size
+
+    def touch(self) -> None:
+        self.version = next(table_module._version_counter)
+
+    def shard_for(self, value: Any) -> int:
+        return partition_of(value, self.partitions)
+
+    def shards_for(self, where: Optional[Dict[str, Any]]) -> List[int]:
+        if where and self.partition_key in where:
+            return [self.shard_for(where[self.partition_key])]
+        return list(range(self.partitions))
+
+    def colocated(self, other: Optional['PartitionedTable'], join: Dict[str, str]) -> bool:
+        """True if matching join rows are guaranteed to live on the same worker."""
+        return (other is not None and other.pool is self.pool
+                and join["left_col"] == self.partition_key and join["right_col"] == other.partition_key)
+
+    def write(self, method: str, command: Any, shards: List[int], log_undo: UndoLogger) -> List[Any]:
+        """Run a write on `shards`, registering one undo entry per shard that changed."""
+        replies = self.pool.scatter([(shard, "execute", (method, command)) for shard in shards])
+        self.pool.open_shards.update(shards)
+        changed = False
+        for shard, (status, payload) in zip(shards, replies):
+            if status == "ok" and payload[0] is not None:
+                log_undo(partial(self._undo, shard, payload[0]))
+                changed = True
+        if changed:
+            self.touch()
+        return [_unwrap(reply)[1] for reply in replies]
+
+    def _undo(self, shard: int, savepoint: int) -> None:
+        self.pool.call(shard, "rollback_to", savepoint)
+        self.touch()
+
+    def select(self, cmd: SelectCommand) -> List[Dict[str, Any]]:
+        """Run a single-table or co-located SELECT on the shards and gather it."""
+        shards = self.shards_for(cmd.where)
+        if cmd.aggregates:
+            states = [RunningAggregate(agg["func"]) for agg in cmd.aggregates]
+            for reply in self.pool.scatter([(shard, "aggregate", (cmd,)) for shard in shards]):
+                for state, shard_state in zip(states, _unwrap(reply)):
+                    state.merge(shard_state)
+            return [{agg["label"]: state.value() for agg, state in zip(cmd.aggregates, states)}]
+        rows = []
+        for reply in self.pool.scatter([(shard, "select", (cmd,)) for shard in shards]):
+            rows.extend(_unwrap(reply))
+        return rows
+
+    def rows(self, where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        return self.select(SelectCommand(self.name, ["*"], where))
+
+    def count(self) -> int:
+        return sum(self.pool.broadcast("count", self.name))
+
+    def definition(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "columns": [
+                {"name": c.name, "type": c.col_type.value, "is_primary": c.is_primary,
+                 "is_unique": c.is_unique, "nullable": c.nullable}
+                for c in self.columns.values()
+            ],
+            "partition_key": self.partition_key,
+            "partitions": self.partitions,
+            "version": self.version,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Definition plus every shard's data, gathered through the coordinator."""
+        data = self.definition()
+        data["shards"] = self.pool.broadcast("dump", self.name)
+        return data
+
+    @staticmethod
+    def columns_from(data: Dict[str, Any]) -> List[Column]:
+        return [
+            Column(c["name"], ColumnType(c["type"]), c["is_primary"], c["is_unique"], c.get("nullable", True))
+            for c in data["columns"]
+        ]
+
+    def restore(self, shards: List[Dict[str, Any]]) -> None:
+        """Load to_dict()["shards"] back into the workers."""
+        for reply in self.pool.scatter([(i, "restore", (shard,)) for i, shard in enumerate(shards)]):
+            _unwrap(reply)
+
+    # Persistence: each worker writes its own shard file, so saving never
+    # pulls the table through the coordinator.
+    def save(self, directory: str) -> None:
+        replies = self.pool.scatter([
+            (i, "save", (self.name, os.path.join(directory, f"{self.name}.{i}.json")))
+            for i in range(self.partitions)
+        ])
+        for reply in replies:
+            _unwrap(reply)
+        atomic_write(os.path.join(directory, f"{self.name}.json"), json.dumps(self.definition(), indent=2))
+
+    def load(self, directory: str) -> None:
+        replies = self.pool.scatter([
+            (i, "load", (os.path.join(directory, f"{self.name}.{i}.json"),))
+            for i in range(self.partitions)
+        ])
+        for reply in replies:
+            _unwrap(reply)
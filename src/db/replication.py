@@ -0,0 +1,297 @@
+import json
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Wire protocol: newline-delimited JSON over a local TCP socket.
+#   follower -> primary: {"log_id": ..., "since": lsn}   (since=None to bootstrap)
+#   primary -> follower: {"type": "snapshot", "log_id", "lsn", "tables"}
+#                        {"type": "commit", "lsn", "time", "statements"}
+#                        {"type": "heartbeat", "lsn", "time"}
+
+@dataclass
+class LogEntry:
+    lsn: int
+    time: float
+    # SQL strings, plus dict entries for Python API writes (see Database._log_write)
+    statements: List[Any]
+
+class ReplicationLog:
+    """Ordered, bounded log of committed write transactions.
+
+    Each entry is one transaction's statements with a log sequence number
+    (LSN). Only the newest `retain` entries are kept; a follower that falls
+    further behind than that re-bootstraps from a snapshot. `log_id` changes
+    on every restart, so followers never mix LSNs from two different logs.
+    """
+    def __init__(self, retain: int = 10000):
+        self.log_id = uuid.uuid4().hex
+        self.last_lsn = 0
+        self._entries: Deque[LogEntry] = deque(maxlen=retain)
+        self._cond = threading.Condition()
+
+    def append(self, statements: List[Any]) -> int:
+        with self._cond:
+            self.last_lsn += 1
+            self._entries.append(LogEntry(self.last_lsn, time.time(), list(statements)))
+            self._cond.notify_all()
+            return self.last_lsn
+
+    def covers(self, since: int) -> bool:
+        """True if every entry after `since` is still retained."""
+        with self._cond:
+            if since > self.last_lsn:
+                return False
+            return since == self.last_lsn or (bool(self._entries) and self._entries[0].lsn <= since + 1)
+
+    def entries_after(self, since: int, timeout: Optional[float] = None) -> Optional[List[LogEntry]]:
+        """Entries with lsn > since, waiting up to `timeout` for one to arrive.
+
+        Returns None if some of them have already been dropped.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self.last_lsn > since, timeout)
+            if not self.covers(since):
+                return None
+            return [e for e in self._entries if e.lsn > since]
+
+    def wake(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+def _send(wfile: Any, message: Dict[str, Any]) -> None:
+    wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+    wfile.flush()
+
+class _StreamHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        primary: Primary = self.server.primary
+        hello = json.loads(self.rfile.readline() or b"{}")
+        log = primary.log
+        since = hello.get("since")
+        try:
+            if hello.get("log_id") != log.log_id or since is None or not log.covers(since):
+                since = self._send_snapshot(primary)
+            primary._follower_connected(self, since)
+            while not primary.closed:
+                entries = log.entries_after(since, timeout=primary.heartbeat_interval)
+                if entries is None:
+                    since = self._send_snapshot(primary)
+                elif entries:
+                    for entry in entries:
+                        _send(self.wfile, {"type": "commit", "lsn": entry.lsn, "time": entry.time,
+                                           "statements": entry.statements})
+                    since = entries[-1].lsn
+                else:
+                    _send(self.wfile, {"type": "heartbeat", "lsn": log.last_lsn, "time": time.time()})
+                primary._follower_progress(self, since)
+        except TimeoutError as e:
+            # The follower reconnects and asks again
+            print(f"Replication snapshot failed: {e}")
+        except OSError:
+            pass  # follower went away
+        finally:
+            primary._follower_disconnected(self)
+
+    def _send_snapshot(self, primary: 'Primary') -> int:
+        lsn, tables = primary.snapshot()
+        _send(self.wfile, {"type": "snapshot", "log_id": primary.log.log_id, "lsn": lsn, "tables": tables})
+        return lsn
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class Primary:
+    """Streams a Database's committed transactions to follower processes."""
+    def __init__(self, db: Any, host: str = "127.0.0.1", port: int = 0,
+                 heartbeat_interval: float = 0.5, retain: int = 10000, snapshot_timeout: float = 30.0):
+        self.db = db
+        self.heartbeat_interval = heartbeat_interval
+        self.snapshot_timeout = snapshot_timeout
+        if db.replication_log is None:
+            db.replication_log = ReplicationLog(retain)
+        self.log: ReplicationLog = db.replication_log
+        self.closed = False
+        self._server = _Server((host, port), _StreamHandler)
+        self._server.primary = self
+        self._thread: Optional[threading.Thread] = None
+        self._followers_lock = threading.Lock()
+        # handler -> (client address, last LSN sent)
+        self._followers: Dict[Any, Tuple[str, int]] = {}
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def start(self) -> 'Primary':
+        self._thread = threading.Thread(target=self._server.serve_forever, name="db-replication", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.closed = True
+        self.log.wake()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def snapshot(self) -> Tuple[int, Dict[str, Any]]:
+        """Serialize every table together with the LSN it corresponds to.
+
+        Waits until no transaction has uncommitted writes, so the snapshot
+        only ever contains committed data, and raises TimeoutError if that
+        takes longer than `snapshot_timeout` seconds.
+        """
+        db = self.db
+        deadline = time.monotonic() + self.snapshot_timeout
+        while True:
+            with db._lock:
+                if db._txn is None or not db._txn.has_writes:
+                    tables = {name: table.to_dict() for name, table in db.tables.items()}
+                    # Partitioned tables are gathered from their workers
+                    tables.update({name: table.to_dict() for name, table in db.partitioned.items()})
+                    return self.log.last_lsn, tables
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"a transaction kept writes uncommitted for over {self.snapshot_timeout}s")
+            time.sleep(0.01)
+
+    def _follower_connected(self, handler: Any, lsn: int) -> None:
+        with self._followers_lock:
+            self._followers[handler] = (f"{handler.client_address[0]}:{handler.client_address[1]}", lsn)
+
+    def _follower_progress(self, handler: Any, lsn: int) -> None:
+        with self._followers_lock:
+            if handler in self._followers:
+                self._followers[handler] = (self._followers[handler][0], lsn)
+
+    def _follower_disconnected(self, handler: Any) -> None:
+        with self._followers_lock:
+            self._followers.pop(handler, None)
+
+    def status(self) -> Dict[str, Any]:
+        with self._followers_lock:
+            followers = [{"address": addr, "sent_lsn": lsn, "lag_entries": self.log.last_lsn - lsn}
+                         for addr, lsn in self._followers.values()]
+        return {"role": "primary", "lsn": self.log.last_lsn, "followers": followers}
+
+class Follower:
+    """Read-only copy of a primary's database, kept current over a socket.
+
+    On connect the follower asks for everything after its last applied LSN;
+    the primary answers with the log tail, or a full snapshot if the tail is
+    gone (or this is the first connect). Connection drops are retried.
+    """
+    def __init__(self, primary_address: Tuple[str, int], db: Any = None, reconnect_delay: float = 0.5):
+        if db is None:
+            from .core import Database
+            db = Database(":memory:")
+        self.db = db
+        self.db.read_only = True
+        self.primary_address = primary_address
+        self.reconnect_delay = reconnect_delay
+        self.log_id: Optional[str] = None
+        self.applied_lsn: Optional[int] = None
+        self.primary_lsn = 0
+        self.connected = False
+        self.last_apply_delay = 0.0
+        self._behind_since: Optional[float] = None
+        self._progress = threading.Condition()
+        self._closed = False
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'Follower':
+        self._thread = threading.Thread(target=self._run, name="db-follower", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._closed = True
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def wait_for(self, lsn: int, timeout: Optional[float] = None) -> bool:
+        """Block until the follower has applied `lsn`. Returns False on timeout."""
+        with self._progress:
+            return self._progress.wait_for(
+                lambda: self.applied_lsn is not None and self.applied_lsn >= lsn, timeout)
+
+    def status(self) -> Dict[str, Any]:
+        with self._progress:
+            applied = self.applied_lsn or 0
+            lag_entries = max(0, self.primary_lsn - applied)
+            lag_seconds = time.time() - self._behind_since if lag_entries and self._behind_since else 0.0
+            return {
+                "role": "follower",
+                "primary": f"{self.primary_address[0]}:{self.primary_address[1]}",
+                "connected": self.connected,
+                "applied_lsn": self.applied_lsn,
+                "primary_lsn": self.primary_lsn,
+                "lag_entries": lag_entries,
+                "lag_seconds": round(lag_seconds, 4),
+                "last_apply_delay_seconds": round(self.last_apply_delay, 4),
+            }
+
+    def _run(self) -> None:
+        while not self._closed:
+            try:
+                self._stream()
+            except (OSError, ValueError) as e:
+                if not self._closed:
+                    print(f"Replication stream interrupted: {e}")
+            self.connected = False
+            if not self._closed:
+                time.sleep(self.reconnect_delay)
+
+    def _stream(self) -> None:
+        with socket.create_connection(self.primary_address) as sock:
+            self._sock = sock
+            rfile = sock.makefile("rb")
+            wfile = sock.makefile("wb")
+            _send(wfile, {"log_id": self.log_id, "since": self.applied_lsn})
+            self.connected = True
+            for line in rfile:
+                if self._closed:
+                    return
+                self._handle(json.loads(line))
+
+    def _handle(self, message: Dict[str, Any]) -> None:
+        kind = message["type"]
+        if kind == "snapshot":
+            db = self.db
+            with db._lock:
+                db._reset_tables()
+                db._load_tables(message["tables"])
+            self.log_id = message["log_id"]
+            self._advance(message["lsn"], message["lsn"])
+        elif kind == "commit":
+            try:
+                self.db.apply_replicated(message["statements"])
+            except Exception as e:
+                # Diverged from the primary; start over from a fresh snapshot
+                self.applied_lsn = None
+                raise ValueError(f"failed to apply LSN {message['lsn']}: {e}")
+            self.last_apply_delay = max(0.0, time.time() - message["time"])
+            self._advance(message["lsn"], max(self.primary_lsn, message["lsn"]))
+        elif kind == "heartbeat":
+            self._advance(self.applied_lsn, message["lsn"])
+
+    def _advance(self, applied: Optional[int], primary_lsn: int) -> None:
+        with self._progress:
+            self.applied_lsn = applied
+            self.primary_lsn = primary_lsn
+            if applied is not None and applied >= primary_lsn:
+                self._behind_since = None
+            elif self._behind_since is None:
+                self._behind_since = time.time()
+            self._progress.notify_all()
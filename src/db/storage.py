@@ -0,0 +1,158 @@
+import itertools
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+def atomic_write(path: str, payload: str) -> None:
+    """Write to a temp file next to `path`, fsync it, then rename over the target."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class FileStore:
+    """The original layout: every table in one JSON document (db.json)."""
+    def __init__(self, path: str):
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def prepare(self, tables: Dict[str, Any], dirty: List[str], dropped: List[str]) -> Optional[str]:
+        """Serialize what needs writing. Runs under the database lock."""
+        if not dirty and not dropped:
+            return None
+        data = {
+            "tables": {name: table.to_dict() for name, table in tables.items()}
+        }
+        return json.dumps(data, indent=2)
+
+    def write(self, job: str) -> None:
+        atomic_write(self.path, job)
+
+    def read(self) -> Dict[str, Dict[str, Any]]:
+        with open(self.path, 'r') as f:
+            return json.load(f).get("tables", {})
+
+class DirectoryStore:
+    """One file per table plus a catalog manifest naming the current file of each table.
+
+    Table files carry the table version in their name, so a save writes the
+    changed tables to fresh files, atomically swaps the catalog, and only then
+    removes the files the old catalog pointed to. A crash at any point leaves a
+    catalog that references complete files.
+    """
+    CATALOG = "catalog.json"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._catalog: Dict[str, Dict[str, Any]] = {}
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.path, self.CATALOG))
+
+    def prepare(self, tables: Dict[str, Any], dirty: List[str], dropped: List[str]) -> Optional[Tuple[Dict[str, Any], Dict[str, str]]]:
+        if not dirty and not dropped:
+            return None
+        catalog = {name: entry for name, entry in self._catalog.items() if name in tables}
+        files = {}
+        for name in dirty:
+            table = tables[name]
+            data = self._serialize(table)
+            indexes = data.pop("indexes", None)
+            file_name = f"{name}.{table.version}.json"
+            files[file_name] = json.dumps(data, separators=(',', ':'))
+            catalog[name] = {"file": file_name, "version": table.version}
+            if indexes is not None:
+                index_file = f"{name}.{table.version}.idx.json"
+                files[index_file] = json.dumps(indexes, separators=(',', ':'))
+                catalog[name]["index_file"] = index_file
+        self._catalog = catalog
+        return catalog, files
+
+    def _serialize(self, table: Any) -> Dict[str, Any]:
+        return table.to_dict()
+
+    def write(self, job: Tuple[Dict[str, Any], Dict[str, str]]) -> None:
+        catalog, files = job
+        os.makedirs(self.path, exist_ok=True)
+        for file_name, payload in files.items():
+            atomic_write(os.path.join(self.path, file_name), payload)
+        atomic_write(os.path.join(self.path, self.CATALOG), json.dumps({"tables": catalog}, indent=2))
+
+        # Anything the new catalog no longer references is garbage now
+        live = {entry["file"] for entry in catalog.values()} | {self.CATALOG}
+        live |= {entry["index_file"] for entry in catalog.values() if "index_file" in entry}
+        for file_name in os.listdir(self.path):
+            if file_name.endswith(".json") and file_name not in live:
+                os.remove(os.path.join(self.path, file_name))
+
+    def read(self) -> Dict[str, Dict[str, Any]]:
+        with open(os.path.join(self.path, self.CATALOG), 'r') as f:
+            catalog = json.load(f).get("tables", {})
+        tables = {}
+        for name, entry in catalog.items():
+            with open(os.path.join(self.path, entry["file"]), 'r') as f:
+                tables[name] = json.load(f)
+            if "pages" in tables[name]:
+                # Only paged tables use saved indexes (older saves have them for every table)
+                tables[name]["indexes"] = self._read_indexes(entry.get("index_file"))
+        self._catalog = catalog
+        return tables
+
+    def _read_indexes(self, file_name: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Index files are a cache: if one is missing or unreadable the table rebuilds it."""
+        if not file_name:
+            return None
+        try:
+            with open(os.path.join(self.path, file_name), 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+class PagedStore(DirectoryStore):
+    """Directory layout for databases whose tables keep their rows in page files.
+
+    Paged tables (anything with catalog_entry()) are written as their page
+    list instead of their rows; the pages themselves are already in
+    `<table>.<n>.pages` and only need flushing. Other tables, such as views,
+    are stored inline as in DirectoryStore. Pages a catalog refers to are
+    never modified afterwards (see PagedRows), so the catalog swap is still
+    the commit point of a save.
+    """
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._saves = itertools.count(1)
+        # Number of the newest save whose catalog is on disk
+        self.durable = 0
+
+    def prepare(self, tables: Dict[str, Any], dirty: List[str], dropped: List[str]) -> Optional[Tuple[Any, ...]]:
+        if not dirty and not dropped:
+            return None
+        save = next(self._saves)
+        live_files = set()
+        for table in tables.values():
+            if hasattr(table, "catalog_entry"):
+                table.rows.flush()
+                table.rows.pin(save, self.durable)
+                live_files.add(table.file_name)
+        job = super().prepare(tables, dirty, dropped)
+        garbage = [name for name in os.listdir(self.path) if name.endswith(".pages") and name not in live_files]
+        return job + (save, garbage)
+
+    def _serialize(self, table: Any) -> Dict[str, Any]:
+        if hasattr(table, "catalog_entry"):
+            return table.catalog_entry()
+        return table.to_dict()
+
+    def write(self, job: Tuple[Any, ...]) -> None:
+        catalog, files, save, garbage = job
+        super().write((catalog, files))
+        for file_name in garbage:
+            try:
+                os.remove(os.path.join(self.path, file_name))
+            except FileNotFoundError:
+                pass
+        self.durable = save
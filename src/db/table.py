@@ -1,5 +1,12 @@
+import itertools
+from bisect import bisect_left, bisect_right
 from enum import Enum
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from . import vectorized
+from .aggregate import aggregate_values
+from .index import CoveringIndex
+from .limits import current_guard, guarded
+from .validation import compile_schema, dictionary_encoded
 
 class ColumnType(Enum):
     INTEGER = "INTEGER"
@@ -15,73 +22,454 @@ class Column:
         self.is_unique = is_unique
         self.nullable = nullable
 
+class StringDictionary:
+    """Per-column dictionary for STRING values.
+
+    Each distinct string is stored once and identified by an integer code.
+    Rows hold the canonical string object (so every row with 'KE' points at
+    the same object), and persistence writes the codes plus the dictionary.
+    Values stay in the dictionary after the last row holding them changes;
+    Table.to_dict() and from_dict() rebuild it from the rows to drop them.
+    """
+    def __init__(self, values: Optional[List[str]] = None):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        for value in values or []:
+            self.encode(value)
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+    def intern(self, value: str) -> str:
+        """Return the canonical object for `value`, adding it if new."""
+        return self.values[self.encode(value)]
+
+    def lookup(self, value: Any) -> Optional[str]:
+        """Canonical object for `value`, or None if no row has ever held it."""
+        code = self.codes.get(value) if isinstance(value, str) else None
+        return None if code is None else self.values[code]
+
+# Version stamps are unique across all tables, so a dropped and re-created
+# table never looks "unchanged" to the persistence layer.
+_version_counter = itertools.count(1)
+
+# Registers how to revert a write (Database._log_undo)
+UndoLogger = Callable[[Callable[[], None]], None]
+
+def _reserve_version(version: int) -> None:
+    """Make sure stamps handed out from now on are newer than a persisted `version`."""
+    global _version_counter
+    upcoming = next(_version_counter)
+    _version_counter = itertools.count(max(upcoming, version + 1))
+
 class Table:
+    # Whether to_dict() may replace the dictionaries with compacted ones
+    _compact_dictionaries = True
+
     def __init__(self, name: str, columns: List[Column]):
         self.name = name
+        self.version = next(_version_counter)
         self.columns = {col.name: col for col in columns}
         self.rows: List[Dict[str, Any]] = []
         # Basic indexing for primary/unique keys
         self._primary_key_index: Dict[Any, int] = {} # maps key value to row index
         self._unique_indices: Dict[str, Dict[Any, int]] = {} # maps col_name -> {value -> row_index}
         
+        # Defining SELECT if this table stores a materialized view
+        self.view_definition: Optional[str] = None
+
+        # Secondary (optionally covering) indexes by name
+        self._secondary_indexes: Dict[str, CoveringIndex] = {}
+
+        # NumPy copies of numeric columns, keyed by column -> (table version, buffer)
+        self._column_buffers: Dict[str, Tuple[int, Optional[vectorized.ColumnBuffer]]] = {}
+        # Column -> table version at which a read last found its buffer missing or stale
+        self._buffer_misses: Dict[str, int] = {}
+
+        # Dictionary encoding for STRING columns (except PRIMARY KEY/UNIQUE ones)
+        self._dictionaries: Dict[str, StringDictionary] = {
+            col.name: StringDictionary() for col in columns
+            if dictionary_encoded(col.col_type.value, col.is_primary, col.is_unique)
+        }
+        
         # Initialize unique indices
         for col in columns:
             if col.is_unique and not col.is_primary:
                 self._unique_indices[col.name] = {}
 
+        # Row checks generated for this schema (shared by tables with the same one)
+        self._compiled = compile_schema(columns)
+
     def insert(self, row_data: Dict[str, Any]) -> None:
-        # Validate schema
-        validated_row = {}
-        
-        for col_name, col_def in self.columns.items():
-            val = row_data.get(col_name)
+        row = self._compiled.validate(self, row_data)
+        # Only index the row once every column has passed and it is stored, so
+        # a rejected insert never leaves a stale index entry behind
+        idx = len(self.rows)
+        self.rows.append(row)
+        self._compiled.index(self, row, idx)
+        for index in self._secondary_indexes.values():
+            index.add(row)
+        self.touch()
+
+    def insert_many(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Bulk-load rows with the same checks as insert(); all or nothing."""
+        start = len(self.rows)
+        compiled = self._compiled
+        indexes = list(self._secondary_indexes.values())
+        try:
+            for row_data in rows:
+                row = compiled.validate(self, row_data)
+                idx = len(self.rows)
+                self.rows.append(row)
+                compiled.index(self, row, idx)
+                for index in indexes:
+                    index.add(row)
+        except Exception:
+            while len(self.rows) > start:
+                self._undo_insert()
+            raise
+        if len(self.rows) > start:
+            self.touch()
+        return len(self.rows) - start
+
+    def update(self, rows: List[Dict[str, Any]], updates: Dict[str, Any],
+               log_undo: Optional[UndoLogger] = None) -> int:
+        """Apply `updates` in place to `rows` (which must belong to this table).
+
+        `log_undo` receives a closure that reverts the change; it only keeps
+        copies of `rows`, not of the table.
+        """
+        updates = self._compiled.check_update(self, updates, rows)
+        if log_undo is not None and rows:
+            previous = [dict(row) for row in rows]
+            log_undo(lambda: self._undo_update(rows, previous, updates))
+        indexes = list(self._secondary_indexes.values())
+        for row in rows:
+            for index in indexes:
+                index.remove(row)
+            row.update(updates)
+            for index in indexes:
+                index.add(row)
+        if rows:
+            if self._touches_keys(updates):
+                self.rebuild_indexes()
+            self.touch()
+        return len(rows)
+
+    def _touches_keys(self, updates: Dict[str, Any]) -> bool:
+        """True if `updates` changes a PRIMARY KEY/UNIQUE column, whose index then needs rebuilding."""
+        return any(self.columns[k].is_primary or self.columns[k].is_unique for k in updates)
+
+    def touch(self) -> None:
+        """Mark the table as modified since it was last persisted."""
+        self.version = next(_version_counter)
+
+    def _undo_update(self, rows: List[Dict[str, Any]], previous: List[Dict[str, Any]],
+                     updates: Dict[str, Any]) -> None:
+        indexes = list(self._secondary_indexes.values())
+        for row, old in zip(rows, previous):
+            for index in indexes:
+                index.remove(row)
+            row.clear()
+            row.update(old)
+            for index in indexes:
+                index.add(row)
+        if self._touches_keys(updates):
+            self.rebuild_indexes()
+        self.touch()
+
+    def delete(self, rows: List[Dict[str, Any]], log_undo: Optional[UndoLogger] = None) -> int:
+        """Remove `rows` (objects from this table, e.g. from select()) and update the indexes."""
+        if not rows:
+            return 0
+        # select() hands back the row objects themselves, so match by identity
+        # rather than comparing dicts
+        deleted = {id(r) for r in rows}
+        kept, removed = [], []
+        for pos, row in enumerate(self.rows):
+            if id(row) in deleted:
+                removed.append((pos, row))
+            else:
+                kept.append(row)
+        self.rows = kept
+        self._unindex(removed)
+        if log_undo is not None:
+            log_undo(lambda: self._undo_delete(removed))
+        self.touch()
+        return len(removed)
+
+    def _undo_delete(self, removed: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """Put deleted rows back at their old positions."""
+        rows: List[Dict[str, Any]] = []
+        remaining = iter(self.rows)
+        for pos, row in removed:
+            rows.extend(itertools.islice(remaining, pos - len(rows)))
+            rows.append(row)
+        rows.extend(remaining)
+        self.rows = rows
+        self._reindex(removed)
+        self.touch()
+
+    def _key_indexes(self) -> Iterator[Tuple[str, Dict[Any, int]]]:
+        for col in self.columns.values():
+            if col.is_primary:
+                yield col.name, self._primary_key_index
+            elif col.is_unique:
+                yield col.name, self._unique_indices[col.name]
 
+    def _unindex(self, removed: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """Update the indexes for the deletion of `removed`, (old position, row) pairs in position order.
+
+        PRIMARY KEY/UNIQUE entries after a deleted row move down by the number
+        of deleted rows before them; no rows need to be read.
+        """
+        for index in self._secondary_indexes.values():
+            for _, row in removed:
+                index.remove(row)
+        positions = [pos for pos, _ in removed]
+        gone = set(positions)
+        for _, index in self._key_indexes():
+            for key, pos in list(index.items()):
+                if pos in gone:
+                    del index[key]
+                elif pos > positions[0]:
+                    index[key] = pos - bisect_left(positions, pos)
+
+    def _reindex(self, removed: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """Undo _unindex() once the rows of `removed` are back at their positions."""
+        positions = [pos for pos, _ in removed]
+        for col, index in self._key_indexes():
+            for key, pos in list(index.items()):
+                if pos >= positions[0]:
+                    # The old position p is the one with p - (deleted rows at or before p) == pos
+                    old = pos
+                    while pos + bisect_right(positions, old) != old:
+                        old = pos + bisect_right(positions, old)
+                    index[key] = old
+            for pos, row in removed:
+                if row.get(col) is not None:
+                    index[row[col]] = pos
+        for index in self._secondary_indexes.values():
+            for _, row in removed:
+                index.add(row)
+
+    def _undo_insert(self) -> None:
+        """Drop the most recently inserted row and its index entries."""
+        row = self.rows.pop()
+        idx = len(self.rows)
+        for index in self._secondary_indexes.values():
+            index.remove(row)
+        for col_name, col_def in self.columns.items():
+            val = row.get(col_name)
             if val is None:
-                if not col_def.nullable and not col_def.is_primary: # Auto-increment logic typically separate, but for now simple check
-                     raise ValueError(f"Column '{col_name}' cannot be null")
-                validated_row[col_name] = None
                 continue
-            
-            # Type checking (simple)
-            if col_def.col_type == ColumnType.INTEGER and not isinstance(val, int):
-                raise TypeError(f"Column '{col_name}' expected INTEGER, got {type(val)}")
-            elif col_def.col_type == ColumnType.STRING and not isinstance(val, str):
-                raise TypeError(f"Column '{col_name}' expected STRING, got {type(val)}")
-            
-            # Unique/Primary checks
-            if col_def.is_primary:
-                if val in self._primary_key_index:
-                    raise ValueError(f"Duplicate primary key '{val}' for column '{col_name}'")
-                self._primary_key_index[val] = len(self.rows)
-            
-            if col_def.is_unique and not col_def.is_primary:
-                 if val in self._unique_indices[col_name]:
-                     raise ValueError(f"Duplicate unique value '{val}' for column '{col_name}'")
-                 self._unique_indices[col_name][val] = len(self.rows)
-
-            validated_row[col_name] = val
-
-        self.rows.append(validated_row)
+            if col_def.is_primary and self._primary_key_index.get(val) == idx:
+                del self._primary_key_index[val]
+            if col_def.is_unique and not col_def.is_primary and self._unique_indices[col_name].get(val) == idx:
+                del self._unique_indices[col_name][val]
+        self.touch()
+
+    def snapshot(self) -> Tuple[List[Dict[str, Any]], Dict[Any, int], Dict[str, Dict[Any, int]]]:
+        """Copy rows and indexes so a transaction can roll back to them."""
+        return (
+            [dict(row) for row in self.rows],
+            dict(self._primary_key_index),
+            {col: dict(index) for col, index in self._unique_indices.items()}
+        )
+
+    def restore(self, state: Tuple[List[Dict[str, Any]], Dict[Any, int], Dict[str, Dict[Any, int]]]) -> None:
+        self.rows, self._primary_key_index, self._unique_indices = state
+        for index in self._secondary_indexes.values():
+            index.rebuild(self.rows)
+        self.touch()
 
     def select(self, where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         # O(N) scan for now, optimizing later
+        guard = current_guard()
         if not where:
+            if guard is not None:
+                guard.scan(len(self.rows))
             return self.rows
+
+        rows = self._key_lookup(where)
+        if rows is not None:
+            return rows
+
+        mask = self._vector_mask(where)
+        if mask is not None:
+            rows = self.rows
+            if guard is not None:
+                guard.scan(len(rows))
+            return [rows[i] for i in vectorized.np.flatnonzero(mask).tolist()]
         
+        # STRING predicates are resolved against the column dictionary first:
+        # a value no row has ever held can't match, and otherwise rows hold the
+        # canonical object, so an identity check replaces string comparison.
+        encoded = []
+        plain = []
+        for k, v in where.items():
+            dictionary = self._dictionaries.get(k)
+            if dictionary is None:
+                plain.append((k, v))
+                continue
+            canonical = dictionary.lookup(v)
+            if canonical is None:
+                return []
+            encoded.append((k, canonical))
+
         results = []
-        for row in self.rows:
+        for row in guarded(self.rows):
             match = True
-            for k, v in where.items():
-                if row.get(k) != v:
+            for k, v in encoded:
+                if row.get(k) is not v:
                     match = False
                     break
+            if match:
+                for k, v in plain:
+                    if row.get(k) != v:
+                        match = False
+                        break
             if match:
                 results.append(row)
         return results
 
+    def _key_lookup(self, where: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Rows matching `where` found through the PRIMARY KEY/UNIQUE index, or None if no key is pinned."""
+        for col, value in where.items():
+            column = self.columns.get(col)
+            if column is None or value is None or not (column.is_primary or column.is_unique):
+                continue
+            index = self._primary_key_index if column.is_primary else self._unique_indices[col]
+            try:
+                pos = index.get(value)
+            except TypeError:  # unhashable predicate value can't match anything
+                return []
+            if pos is None:
+                return []
+            row = self.rows[pos]
+            return [row] if all(row.get(k) == v for k, v in where.items()) else []
+        return None
+
+    def aggregate(self, func: str, col: str, where: Optional[Dict[str, Any]] = None) -> Any:
+        """Compute func(col) over the rows matching `where`. `col` is "*" for COUNT(*)."""
+        if col != "*" and col in self.columns and self._vectorizable(col):
+            buf = self._column_buffer(col)
+            mask = self._vector_mask(where) if where else None
+            if buf is not None and (mask is not None or not where):
+                guard = current_guard()
+                if guard is not None:
+                    guard.scan(len(self.rows))
+                return vectorized.aggregate(func, buf, mask, self.rows, col)
+
+        rows = self.select(where)
+        if col == "*":
+            return len(rows)
+        return aggregate_values(func, [row[col] for row in rows if row.get(col) is not None])
+
+    def _vectorizable(self, col: str) -> bool:
+        return (vectorized.ENABLED and len(self.rows) >= vectorized.MIN_ROWS
+                and self.columns[col].col_type in (ColumnType.INTEGER, ColumnType.FLOAT))
+
+    def _column_buffer(self, col: str) -> Optional[vectorized.ColumnBuffer]:
+        """The column's buffer, or None to use the Python path.
+
+        Every write invalidates the buffers, and building one costs about three
+        Python scans. So a missing or stale buffer is only built when a second
+        read finds the table unchanged since the previous one; until then the
+        caller scans in Python.
+        """
+        cached = self._column_buffers.get(col)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        if self._buffer_misses.get(col) != self.version:
+            self._buffer_misses[col] = self.version
+            return None
+        buf = vectorized.build_buffer(self.rows, col)
+        self._column_buffers[col] = (self.version, buf)
+        return buf
+
+    def _vector_mask(self, where: Dict[str, Any]) -> Optional[Any]:
+        """Boolean mask for an all-numeric equality predicate, or None to use the Python path."""
+        buffers = {}
+        for col, value in where.items():
+            if col not in self.columns or not self._vectorizable(col) or not vectorized.comparable(value):
+                return None
+            buf = self._column_buffer(col)
+            if buf is None:
+                return None
+            buffers[col] = buf
+        return vectorized.equality_mask(buffers, where, len(self.rows))
+
+    def create_index(self, name: str, columns: List[str], include: Optional[List[str]] = None) -> CoveringIndex:
+        if name in self._secondary_indexes:
+            raise ValueError(f"Index '{name}' already exists on table '{self.name}'")
+        for col in [*columns, *(include or [])]:
+            if col not in self.columns:
+                raise ValueError(f"Column '{col}' does not exist in table '{self.name}'")
+        index = CoveringIndex(name, columns, include)
+        index.rebuild(self.rows)
+        self._secondary_indexes[name] = index
+        self.touch()
+        return index
+
+    def drop_index(self, name: str) -> None:
+        if self._secondary_indexes.pop(name, None) is not None:
+            self.touch()
+
+    def index_only_select(self, where: Dict[str, Any], columns: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """Answer `SELECT columns ... WHERE where` from a covering index, or None if none covers it."""
+        for index in self._secondary_indexes.values():
+            if index.covers(where, columns):
+                # Same column order as a projection of full rows would give
+                return index.lookup(where, [c for c in self.columns if c in columns])
+        return None
+
+    def rebuild_indexes(self) -> None:
+        """Recompute the primary/unique/secondary indexes from `rows`."""
+        for index in self._secondary_indexes.values():
+            index.rebuild(self.rows)
+        self._primary_key_index = {}
+        self._unique_indices = {}
+        for col in self.columns.values():
+            if not (col.is_primary or col.is_unique):
+                continue
+            name = col.name
+            index = {row[name]: idx for idx, row in enumerate(self.rows) if row.get(name) is not None}
+            if col.is_primary:
+                self._primary_key_index = index
+            else:
+                self._unique_indices[name] = index
+
     def to_dict(self) -> Dict[str, Any]:
-        """Serialize table to dict for persistence."""
-        return {
+        """Serialize table to dict for persistence.
+
+        Dictionary-encoded STRING columns are written as integer codes into a
+        per-column dictionary. The dictionaries are rebuilt from the rows on
+        the way, so values no row holds any more are dropped (and, unless
+        _compact_dictionaries is off, from memory too).
+        """
+        rows = self.rows
+        if self._dictionaries:
+            compacted = {col: StringDictionary() for col in self._dictionaries}
+            rows = []
+            for row in self.rows:
+                encoded = dict(row)
+                for col, dictionary in compacted.items():
+                    value = row.get(col)
+                    if value is not None:
+                        encoded[col] = dictionary.encode(value)
+                rows.append(encoded)
+            if self._compact_dictionaries:
+                # Same canonical objects as before, so identity checks still hold
+                self._dictionaries = compacted
+        else:
+            compacted = self._dictionaries
+        data = {
             "name": self.name,
             "columns": [
                 {
@@ -93,8 +481,14 @@ class Table:
                 } 
                 for c in self.columns.values()
             ],
-            "rows": self.rows
+            "version": self.version,
+            "secondary_indexes": [index.definition() for index in self._secondary_indexes.values()],
+            "dictionaries": {col: d.values for col, d in compacted.items()},
+            "rows": rows
         }
+        if self.view_definition is not None:
+            data["view"] = self.view_definition
+        return data
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> 'Table':
@@ -110,16 +504,30 @@ class Table:
         ]
         table = Table(data["name"], cols)
         table.rows = data["rows"]
-        # Rebuild index
-        for idx, row in enumerate(table.rows):
-            for col in cols:
-                val = row.get(col.name)
-                if val is None: continue
-                
-                if col.is_primary:
-                     table._primary_key_index[val] = idx
-                if col.is_unique and not col.is_primary:
-                    if col.name not in table._unique_indices:
-                        table._unique_indices[col.name] = {}
-                    table._unique_indices[col.name][val] = idx
+        table.view_definition = data.get("view")
+        if "dictionaries" in data:
+            # Intern while decoding, so the dictionary only holds values in use.
+            # Older snapshots may also have codes for key columns, which are
+            # now stored as plain strings.
+            decoders = [(col, values, table._dictionaries.get(col)) for col, values in data["dictionaries"].items()]
+            for row in table.rows:
+                for col, values, dictionary in decoders:
+                    code = row.get(col)
+                    if code is not None:
+                        row[col] = values[code] if dictionary is None else dictionary.intern(values[code])
+        else:
+            # Older snapshots hold plain strings; intern them on the way in
+            for row in table.rows:
+                for col, dictionary in table._dictionaries.items():
+                    val = row.get(col)
+                    if isinstance(val, str):
+                        row[col] = dictionary.intern(val)
+        for index in data.get("secondary_indexes", []):
+            table._secondary_indexes[index["name"]] = CoveringIndex(index["name"], index["columns"], index["include"])
+        if "version" in data:
+            table.version = data["version"]
+            _reserve_version(table.version)
+        # The rows are in memory already, and rebuilding the indexes from them
+        # is faster than reading a persisted copy
+        table.rebuild_indexes()
         return table
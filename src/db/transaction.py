@@ -0,0 +1,44 @@
+from typing import Any, Callable, List
+
+class Transaction:
+    """Undo log for one unit of work.
+
+    Every write registers a closure that reverts it. Rolling back replays
+    the closures newest-first, so the tables end up exactly as they were
+    when the transaction (or savepoint) started.
+    """
+    def __init__(self, explicit: bool = False):
+        self.explicit = explicit
+        self.has_writes = False
+        self._undo_log: List[Callable[[], None]] = []
+        # SQL of the statements that wrote something, in execution order (or,
+        # for Python API writes, the dict entries described in Database._log_write)
+        self.statements: List[Any] = []
+        # Run once the transaction commits, e.g. to release what it dropped
+        self.commit_hooks: List[Callable[[], None]] = []
+
+    def record(self, undo: Callable[[], None]) -> None:
+        self._undo_log.append(undo)
+        self.has_writes = True
+
+    def log_statement(self, statement: Any) -> None:
+        """Remember a write statement; rolling back past it forgets it again."""
+        self.statements.append(statement)
+        self.record(self.statements.pop)
+
+    def on_commit(self, hook: Callable[[], None]) -> None:
+        """Run `hook` when the transaction commits; rolling back past this call cancels it."""
+        self.commit_hooks.append(hook)
+        self.record(self.commit_hooks.pop)
+
+    def savepoint(self) -> int:
+        """Mark the current position in the undo log."""
+        return len(self._undo_log)
+
+    def rollback(self, savepoint: int = 0) -> None:
+        """Undo everything recorded after `savepoint` (default: the whole transaction)."""
+        while len(self._undo_log) > savepoint:
+            undo = self._undo_log.pop()
+            undo()
+        if not self._undo_log:
+            self.has_writes = False
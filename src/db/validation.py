@@ -0,0 +1,142 @@
+from typing import Any, Callable, Dict, List, Tuple
+
+class CompiledSchema:
+    """Straight-line row functions generated for one table schema.
+
+    Table.insert used to walk the column definitions and branch on each
+    column's type for every row. Instead, compile_schema() writes a Python
+    function per operation with one unrolled block per column (type check,
+    NULL check, interning, key probes) and compiles it once per distinct
+    schema. The functions take the table as their first argument and read
+    its indexes and dictionaries from it on each call, because those objects
+    are replaced when indexes are rebuilt or a table is reloaded.
+
+    - validate(table, row_data): checked, interned row dict in column order
+    - index(table, row, idx): add the row at position idx to the PRIMARY KEY/UNIQUE indexes
+    - check_update(table, updates, rows): checked, interned SET values for `rows`
+    - encode(table, row) / decode(table, values): row <-> list of values with dictionary codes
+    """
+    def __init__(self, source: str, namespace: Dict[str, Any]):
+        self.source = source
+        self.validate: Callable[[Any, Dict[str, Any]], Dict[str, Any]] = namespace["validate"]
+        self.index: Callable[[Any, Dict[str, Any], int], None] = namespace["index"]
+        self.check_update: Callable[[Any, Dict[str, Any], List[Dict[str, Any]]], Dict[str, Any]] = namespace["check_update"]
+        self.encode: Callable[[Any, Dict[str, Any]], List[Any]] = namespace["encode"]
+        self.decode: Callable[[Any, List[Any]], Dict[str, Any]] = namespace["decode"]
+
+_compiled: Dict[Tuple[Any, ...], CompiledSchema] = {}
+
+def schema_key(columns: List[Any]) -> Tuple[Any, ...]:
+    return tuple((c.name, c.col_type.value, c.is_primary, c.is_unique, c.nullable) for c in columns)
+
+def dictionary_encoded(col_type: str, is_primary: bool, is_unique: bool) -> bool:
+    """Whether a column's values are interned in a StringDictionary.
+
+    PRIMARY KEY and UNIQUE columns hold a different value in every row, so a
+    dictionary would only add a lookup per insert and an entry per row.
+    """
+    return col_type == "STRING" and not (is_primary or is_unique)
+
+def compile_schema(columns: List[Any]) -> CompiledSchema:
+    """The CompiledSchema for `columns` (Column objects), generating it on first use."""
+    key = schema_key(columns)
+    compiled = _compiled.get(key)
+    if compiled is None:
+        source = _generate(key)
+        namespace: Dict[str, Any] = {}
+        exec(compile(source, f"<schema {', '.join(c[0] for c in key)}>", "exec"), namespace)
+        compiled = _compiled[key] = CompiledSchema(source, namespace)
+    return compiled
+
+def _check_value(lines: List[str], indent: str, var: str, i: int, col: Tuple[Any, ...],
+                 probe: List[str]) -> None:
+    """Emit the NULL/type checks for one column value held in `var`.
+
+    `probe` is code (e.g. a key lookup) that only runs for non-NULL values.
+    """
+    name, col_type, is_primary, is_unique, nullable = col
+    body = []
+    if col_type in ("INTEGER", "STRING"):
+        expected = "int" if col_type == "INTEGER" else "str"
+        message = f"Column '{name}' expected {col_type}, got "
+        body.append(f"if not isinstance({var}, {expected}):")
+        body.append(f"    raise TypeError({message!r} + str(type({var})))")
+    if dictionary_encoded(col_type, is_primary, is_unique):
+        body.append(f"{var} = d{i}.intern({var})")
+    body += probe
+    if not nullable and not is_primary:
+        lines.append(f"{indent}if {var} is None:")
+        message = f"Column '{name}' cannot be null"
+        lines.append(f"{indent}    raise ValueError({message!r})")
+        if body:
+            lines.append(f"{indent}else:")
+    elif body:
+        lines.append(f"{indent}if {var} is not None:")
+    lines += [f"{indent}    {line}" for line in body]
+
+def _key_error(name: str, is_primary: bool, var: str) -> str:
+    kind = "Duplicate primary key '" if is_primary else "Duplicate unique value '"
+    suffix = f"' for column '{name}'"
+    return f"ValueError({kind!r} + str({var}) + {suffix!r})"
+
+def _generate(key: Tuple[Any, ...]) -> str:
+    strings = [i for i, col in enumerate(key) if dictionary_encoded(*col[1:4])]
+    keyed = [i for i, col in enumerate(key) if col[2] or col[3]]
+
+    def prologue(lines: List[str], dictionaries: str = "") -> None:
+        for i in strings:
+            lines.append(f"    d{i} = table._dictionaries[{key[i][0]!r}]{dictionaries}")
+
+    def key_index(i: int) -> str:
+        return "table._primary_key_index" if key[i][2] else f"table._unique_indices[{key[i][0]!r}]"
+
+    lines = ["def validate(table, row_data):", "    get = row_data.get"]
+    prologue(lines)
+    for i in keyed:
+        lines.append(f"    k{i} = {key_index(i)}")
+    for i, col in enumerate(key):
+        lines.append(f"    v{i} = get({col[0]!r})")
+        probe = [f"if v{i} in k{i}:", f"    raise {_key_error(col[0], col[2], f'v{i}')}"] if i in keyed else []
+        _check_value(lines, "    ", f"v{i}", i, col, probe)
+    lines.append("    return {" + ", ".join(f"{col[0]!r}: v{i}" for i, col in enumerate(key)) + "}")
+
+    lines += ["", "def index(table, row, idx):"]
+    for i in keyed:
+        lines.append(f"    v = row[{key[i][0]!r}]")
+        lines.append(f"    if v is not None:")
+        lines.append(f"        {key_index(i)}[v] = idx")
+    lines.append("    return None")
+
+    # UPDATE: a key column can only be set on a single row, to a value no
+    # other row holds (the index hit may be that row itself, unchanged)
+    lines += ["", "def check_update(table, updates, rows):", "    checked = {}"]
+    prologue(lines)
+    for i, col in enumerate(key):
+        lines.append(f"    if {col[0]!r} in updates:")
+        lines.append(f"        v = updates[{col[0]!r}]")
+        probe = [
+            f"if rows and (len(rows) > 1 or (v in {key_index(i)} and rows[0].get({col[0]!r}) != v)):",
+            f"    raise {_key_error(col[0], col[2], 'v')}",
+        ] if i in keyed else []
+        _check_value(lines, "        ", "v", i, col, probe)
+        lines.append(f"        checked[{col[0]!r}] = v")
+    lines.append("    return checked")
+
+    lines += ["", "def encode(table, row):", "    get = row.get"]
+    prologue(lines, ".encode")
+    values = []
+    for i, col in enumerate(key):
+        if i in strings:
+            lines.append(f"    v{i} = get({col[0]!r})")
+            values.append(f"None if v{i} is None else d{i}(v{i})")
+        else:
+            values.append(f"get({col[0]!r})")
+    lines.append("    return [" + ", ".join(values) + "]")
+
+    lines += ["", "def decode(table, values):"]
+    prologue(lines, ".values")
+    lines.append("    " + ", ".join(f"v{i}" for i in range(len(key))) + ("," if len(key) == 1 else "") + " = values")
+    lines.append("    return {" + ", ".join(
+        f"{col[0]!r}: " + (f"None if v{i} is None else d{i}[v{i}]" if i in strings else f"v{i}")
+        for i, col in enumerate(key)) + "}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,100 @@
+"""Optional NumPy backend for numeric predicates and aggregates.
+
+NumPy is not a hard dependency: when it is missing, ENABLED is False and
+every caller takes the pure-Python path. Results must be identical to that
+path, so anything the arrays can't represent exactly (ints beyond int64,
+bools, NaN, non-numeric junk in a FLOAT column) makes the buffer builder
+give up and the caller falls back.
+"""
+import math
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+ENABLED = np is not None
+
+# Below this many rows the Python loop is cheaper than building masks
+MIN_ROWS = 1024
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+# Integers beyond this lose precision once mixed into a float64 buffer
+_FLOAT_EXACT = 1 << 53
+
+class ColumnBuffer:
+    """One column of a table as a NumPy array plus a validity (non-null) mask."""
+    def __init__(self, data: Any, valid: Any, is_integer: bool):
+        self.data = data
+        self.valid = valid
+        self.is_integer = is_integer
+
+def build_buffer(rows: List[Dict[str, Any]], col: str) -> Optional[ColumnBuffer]:
+    values = [row.get(col) for row in rows]
+    is_integer = True
+    for v in values:
+        if v is None:
+            continue
+        if isinstance(v, bool) or not isinstance(v, (int, float)):
+            return None
+        if isinstance(v, float):
+            if math.isnan(v):
+                return None
+            is_integer = False
+        elif not _INT64_MIN <= v <= _INT64_MAX:
+            return None
+    if not is_integer and any(isinstance(v, int) and abs(v) > _FLOAT_EXACT for v in values if v is not None):
+        return None
+    valid = np.fromiter((v is not None for v in values), dtype=bool, count=len(values))
+    dtype = np.int64 if is_integer else np.float64
+    data = np.fromiter((0 if v is None else v for v in values), dtype=dtype, count=len(values))
+    return ColumnBuffer(data, valid, is_integer)
+
+def comparable(value: Any) -> bool:
+    """Whether a predicate constant can be compared against a buffer without changing semantics."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    if isinstance(value, float):
+        return not math.isnan(value)
+    return abs(value) <= _FLOAT_EXACT
+
+def equality_mask(buffers: Dict[str, ColumnBuffer], where: Dict[str, Any], length: int) -> Any:
+    mask = np.ones(length, dtype=bool)
+    for col, value in where.items():
+        buf = buffers[col]
+        mask &= buf.valid
+        mask &= buf.data == value
+    return mask
+
+def aggregate(func: str, buf: ColumnBuffer, mask: Optional[Any], rows: List[Dict[str, Any]], col: str) -> Any:
+    """Aggregate the rows selected by `mask` (all rows if None), matching aggregate.aggregate_values exactly."""
+    selected = buf.valid if mask is None else mask & buf.valid
+    count = int(np.count_nonzero(selected))
+    if func == "COUNT":
+        return count
+    if count == 0:
+        return None
+    if func in ("MIN", "MAX"):
+        # Return the original object of the first extreme row, as min()/max() would
+        if buf.is_integer:
+            fill = _INT64_MAX if func == "MIN" else _INT64_MIN
+        else:
+            fill = math.inf if func == "MIN" else -math.inf
+        masked = np.where(selected, buf.data, fill)
+        extreme = masked.min() if func == "MIN" else masked.max()
+        position = int(np.flatnonzero(selected & (masked == extreme))[0])
+        return rows[position][col]
+    values = buf.data[selected]
+    if buf.is_integer:
+        # int64 sums are exact as long as they can't overflow
+        bound = max(abs(int(values.min())), abs(int(values.max())))
+        total = int(values.sum()) if bound * count <= _INT64_MAX else sum(values.tolist())
+    else:
+        total = math.fsum(values.tolist())
+    if func == "SUM":
+        return total
+    if func == "AVG":
+        return total / count
+    raise ValueError(f"Unknown aggregate: {func}")
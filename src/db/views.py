@@ -0,0 +1,209 @@
+from typing import Any, Callable, Dict, List, Tuple
+from .table import Table, Column, ColumnType
+from .aggregate import RunningAggregate
+from src.parser.commands import SelectCommand
+
+UndoLogger = Callable[[Callable[[], None]], None]
+
+class MaterializedView:
+    """A SELECT whose result is stored in a regular Table and kept up to date.
+
+    Base-table writes are turned into deltas (rows inserted, rows deleted;
+    an UPDATE is both) and applied to the stored result:
+
+    - filter + projection: matching rows are added/removed one by one
+    - equi-join: each delta row is joined against the other base table
+    - COUNT/SUM/AVG (and MIN/MAX on insert): running aggregates
+
+    Anything else (self-joins, aggregates over joins, a MIN/MAX losing its
+    extreme) falls back to recomputing the view, as does REFRESH.
+    """
+    def __init__(self, name: str, sql: str, select: SelectCommand, table: Table):
+        self.name = name
+        self.sql = sql
+        self.select = select
+        self.table = table
+        self.join_table = select.join["table"] if select.join else None
+        self._aggregates: List[RunningAggregate] = []
+
+    @property
+    def base_tables(self) -> List[str]:
+        return [self.select.table_name] + ([self.join_table] if self.join_table else [])
+
+    @property
+    def _incremental(self) -> bool:
+        if self.select.join and self.select.aggregates:
+            return False
+        return self.join_table != self.select.table_name
+
+    @staticmethod
+    def create(name: str, sql: str, select: SelectCommand, db: Any) -> 'MaterializedView':
+        view = MaterializedView(name, sql, select, Table(name, MaterializedView._columns(select, db)))
+        view.table.view_definition = sql
+        return view
+
+    @staticmethod
+    def _columns(select: SelectCommand, db: Any) -> List[Column]:
+        left = db.get_table(select.table_name)
+        if not left:
+            raise ValueError(f"Table '{select.table_name}' does not exist")
+        # Same column order and precedence as {**left_row, **right_row}
+        merged = dict(left.columns)
+        if select.join:
+            right = db.get_table(select.join["table"])
+            if not right:
+                raise ValueError(f"Joined Table '{select.join['table']}' does not exist")
+            for col_name, col in right.columns.items():
+                merged[col_name] = col
+
+        if select.aggregates:
+            columns = []
+            for agg in select.aggregates:
+                base = merged.get(agg["column"])
+                if agg["column"] != "*" and base is None:
+                    raise ValueError(f"Column '{agg['column']}' does not exist")
+                if agg["func"] == "COUNT":
+                    col_type = ColumnType.INTEGER
+                elif agg["func"] == "AVG" or (agg["func"] == "SUM" and base.col_type != ColumnType.INTEGER):
+                    col_type = ColumnType.FLOAT
+                else:
+                    col_type = base.col_type
+                columns.append(Column(agg["label"], col_type))
+            return columns
+
+        if "*" not in select.columns:
+            merged = {k: col for k, col in merged.items() if k in select.columns}
+        return [Column(col.name, col.col_type) for col in merged.values()]
+
+    def _project(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        if "*" in self.select.columns:
+            return row
+        return {k: v for k, v in row.items() if k in self.select.columns}
+
+    def _matches_where(self, row: Dict[str, Any]) -> bool:
+        return all(row.get(k) == v for k, v in (self.select.where or {}).items())
+
+    def _input_rows(self, db: Any) -> List[Dict[str, Any]]:
+        """The joined/filtered rows the view is computed from, before projection."""
+        select = SelectCommand(self.select.table_name, ["*"], self.select.where, self.select.join)
+        return db._exec_select(select)
+
+    def refresh(self, db: Any, log_undo: UndoLogger) -> None:
+        """Recompute the stored result from the base tables."""
+        state = (self.table.snapshot(), self._aggregates)
+        log_undo(lambda: self._restore(state))
+        rows = self._input_rows(db)
+
+        self.table.rows = []
+        self.table.rebuild_indexes()
+        if self.select.aggregates:
+            self._aggregates = [RunningAggregate(agg["func"]) for agg in self.select.aggregates]
+            for row in rows:
+                self._fold(row, add=True)
+            self.table.insert(self._aggregate_row())
+        else:
+            self.table.insert_many(self._project(row) for row in rows)
+
+    def _restore(self, state: Any) -> None:
+        table_state, self._aggregates = state
+        self.table.restore(table_state)
+
+    def apply(self, db: Any, table_name: str, inserted: List[Dict[str, Any]],
+              deleted: List[Dict[str, Any]], log_undo: UndoLogger) -> None:
+        """Bring the view up to date after `table_name` lost `deleted` and gained `inserted`."""
+        if table_name not in self.base_tables or not (inserted or deleted):
+            return
+        if not self._incremental:
+            self.refresh(db, log_undo)
+            return
+
+        if self.select.join:
+            deleted = self._join_delta(db, table_name, deleted)
+            inserted = self._join_delta(db, table_name, inserted)
+        else:
+            deleted = [r for r in deleted if self._matches_where(r)]
+            inserted = [r for r in inserted if self._matches_where(r)]
+        if not (inserted or deleted):
+            return
+
+        if self.select.aggregates:
+            self._apply_aggregates(db, inserted, deleted, log_undo)
+            return
+
+        if deleted:
+            # The view is a multiset: each deleted input row removes one equal result row.
+            # One pass over the view collects the candidates for every deleted row,
+            # last first, so pop() takes the earliest remaining one.
+            wanted = {_row_key(self._project(row)) for row in deleted}
+            candidates: Dict[Tuple[Any, ...], List[Dict[str, Any]]] = {}
+            for candidate in reversed(self.table.rows):
+                key = _row_key(candidate)
+                if key in wanted:
+                    candidates.setdefault(key, []).append(candidate)
+            victims = []
+            for row in deleted:
+                matches = candidates.get(_row_key(self._project(row)))
+                if matches:
+                    victims.append(matches.pop())
+            self.table.delete(victims, log_undo)
+        for row in inserted:
+            self.table.insert(self._project(row))
+            log_undo(self.table._undo_insert)
+
+    def _join_delta(self, db: Any, table_name: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Join delta rows of one base table against the current contents of the other."""
+        left_col = self.select.join["left_col"]
+        right_col = self.select.join["right_col"]
+        joined = []
+        if table_name == self.select.table_name:
+            other = db.get_table(self.join_table)
+            for row in rows:
+                if row.get(left_col) is None or not self._matches_where(row):
+                    continue
+                for match in other.select({right_col: row[left_col]}):
+                    joined.append({**row, **match})
+        else:
+            left = db.get_table(self.select.table_name)
+            for row in rows:
+                if row.get(right_col) is None:
+                    continue
+                for match in left.select({left_col: row[right_col]}):
+                    if self._matches_where(match):
+                        joined.append({**match, **row})
+        return joined
+
+    def _fold(self, row: Dict[str, Any], add: bool) -> None:
+        for agg, state in zip(self.select.aggregates, self._aggregates):
+            value = 1 if agg["column"] == "*" else row.get(agg["column"])
+            if add:
+                state.add(value)
+            else:
+                state.remove(value)
+
+    def _aggregate_row(self) -> Dict[str, Any]:
+        return {agg["label"]: state.value() for agg, state in zip(self.select.aggregates, self._aggregates)}
+
+    def _apply_aggregates(self, db: Any, inserted: List[Dict[str, Any]],
+                          deleted: List[Dict[str, Any]], log_undo: UndoLogger) -> None:
+        previous = [_copy_state(s) for s in self._aggregates]
+        table_state = self.table.snapshot()
+        log_undo(lambda: self._restore((table_state, previous)))
+
+        for row in deleted:
+            self._fold(row, add=False)
+        for row in inserted:
+            self._fold(row, add=True)
+        if not all(state.exact for state in self._aggregates):
+            self.refresh(db, log_undo)
+            return
+        self.table.update(self.table.rows, self._aggregate_row())
+
+def _row_key(row: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Hashable form of a row; rows that compare equal get equal keys."""
+    return tuple(sorted(row.items(), key=lambda item: item[0]))
+
+def _copy_state(state: RunningAggregate) -> RunningAggregate:
+    copy = RunningAggregate(state.func)
+    copy.__dict__.update(state.__dict__)
+    copy.partials = list(state.partials)
+    return copy
@@ -0,0 +1,244 @@
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional
+
+# Add project root to sys.path to allow running as script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from werkzeug.serving import make_server
+
+import src.app as web
+from src.db.core import Database
+
+TABLE = "loadtest_items"
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of `samples` (0 for an empty list)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = min(max(1, math.ceil(pct / 100 * len(ordered))), len(ordered))
+    return ordered[rank - 1]
+
+class Recorder:
+    """Thread-safe collection of (operation, latency, ok) samples."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, op: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies.setdefault(op, []).append(seconds)
+            if not ok:
+                self.errors[op] = self.errors.get(op, 0) + 1
+
+class ServerTimers:
+    """Wraps Database methods to measure how much server time they take."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.totals[name] = self.totals.get(name, 0.0) + elapsed
+                    self.calls[name] = self.calls.get(name, 0) + 1
+        return timed
+
+def start_server(db: Database, port: int = 0):
+    """Serve the Flask app against `db` on a background thread. Returns (server, base_url)."""
+    web.db = db
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", port, web.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def seed(db: Database, rows: int) -> None:
+    db.execute_query(f"CREATE TABLE {TABLE} (id INT PRIMARY KEY, name STRING, qty INT)")
+    script = ";".join(
+        f"INSERT INTO {TABLE} (id, name, qty) VALUES ({i}, 'item{i % 50}', {i % 100})" for i in range(rows)
+    )
+    if script:
+        db.execute_query(script)
+    db.sync()
+
+def _request(url: str, payload: Optional[Dict[str, Any]] = None) -> bool:
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            resp.read()
+            return resp.status == 200
+    except (urllib.error.URLError, OSError):
+        return False
+
+def run(clients: int = 8, duration: float = 10.0, requests: Optional[int] = None,
+        mix: Optional[Dict[str, float]] = None, seed_rows: int = 1000,
+        db_path: Optional[str] = None, layout: str = "file") -> Dict[str, Any]:
+    """Replay a read/write/metadata mix against a locally served app and return a report.
+
+    `mix` weights the operations: "read" (point SELECT by primary key),
+    "scan" (SELECT with a non-indexed filter), "write" (INSERT) and
+    "tables" (GET /api/tables). With `requests` set, each client issues that
+    many requests; otherwise clients run for `duration` seconds.
+    """
+    mix = mix or {"read": 70, "scan": 10, "write": 15, "tables": 5}
+    ops = [op for op, weight in mix.items() if weight > 0]
+    weights = [mix[op] for op in ops]
+
+    tmpdir = None
+    if db_path is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmpdir.name, "loadtest.json" if layout == "file" else "loadtest")
+    db = Database(db_path, layout=layout)
+    seed(db, seed_rows)
+
+    timers = ServerTimers()
+    db.sync = timers.wrap("db.sync", db.sync)
+    db.get_tables = timers.wrap("db.get_tables", db.get_tables)
+    db.execute_query = timers.wrap("db.execute_query", db.execute_query)
+
+    previous_db = web.db
+    server, base_url = start_server(db)
+    recorder = Recorder()
+    next_id = iter(range(seed_rows, 1 << 62))
+    id_lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(worker: int) -> None:
+        rng = random.Random(worker)
+        issued = 0
+        while True:
+            if requests is not None:
+                if issued >= requests:
+                    return
+            elif time.perf_counter() >= deadline:
+                return
+            issued += 1
+            op = rng.choices(ops, weights)[0]
+            if op == "tables":
+                url, payload = f"{base_url}/api/tables", None
+            else:
+                if op == "read":
+                    sql = f"SELECT * FROM {TABLE} WHERE id={rng.randrange(max(seed_rows, 1))}"
+                elif op == "scan":
+                    sql = f"SELECT id, qty FROM {TABLE} WHERE name='item{rng.randrange(50)}'"
+                else:
+                    with id_lock:
+                        new_id = next(next_id)
+                    sql = f"INSERT INTO {TABLE} (id, name, qty) VALUES ({new_id}, 'item{new_id % 50}', {new_id % 100})"
+                url, payload = f"{base_url}/api/query", {"query": sql}
+            start = time.perf_counter()
+            ok = _request(url, payload)
+            recorder.add(op, time.perf_counter() - start, ok)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+    web.db = previous_db
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+    return build_report(recorder, timers, elapsed, clients)
+
+def build_report(recorder: Recorder, timers: ServerTimers, elapsed: float, clients: int) -> Dict[str, Any]:
+    def summarize(samples: List[float], errors: int) -> Dict[str, Any]:
+        return {
+            "requests": len(samples),
+            "errors": errors,
+            "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+            "p50_ms": round(percentile(samples, 50) * 1000, 2),
+            "p95_ms": round(percentile(samples, 95) * 1000, 2),
+            "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        }
+
+    everything = [s for samples in recorder.latencies.values() for s in samples]
+    total_errors = sum(recorder.errors.values())
+    # Server time is spread across `clients` concurrent handlers
+    busy = elapsed * clients
+    return {
+        "clients": clients,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(everything) / elapsed, 1) if elapsed else 0.0,
+        "overall": summarize(everything, total_errors),
+        "operations": {
+            op: summarize(samples, recorder.errors.get(op, 0))
+            for op, samples in sorted(recorder.latencies.items())
+        },
+        "server_time": {
+            name: {
+                "calls": timers.calls[name],
+                "total_seconds": round(total, 4),
+                "avg_ms": round(total / timers.calls[name] * 1000, 3),
+                "share_of_client_time": round(total / busy, 4) if busy else 0.0,
+            }
+            for name, total in sorted(timers.totals.items())
+        },
+    }
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{report['clients']} clients, {report['elapsed_seconds']}s, {report['throughput_rps']} req/s")
+    print()
+    header = f"{'operation':<10} {'requests':>9} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for op, s in [*report["operations"].items(), ("overall", report["overall"])]:
+        print(f"{op:<10} {s['requests']:>9} {s['errors']:>7} {s['p50_ms']:>9} {s['p95_ms']:>9} {s['p99_ms']:>9}")
+    print()
+    print("Server-side time (share of total client wall time):")
+    for name, s in report["server_time"].items():
+        print(f"  {name:<18} {s['calls']:>7} calls  avg {s['avg_ms']:>8} ms  {s['share_of_client_time'] * 100:>5.1f}%")
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse 'read=70,write=20,tables=10' into weights."""
+    mix = {}
+    for part in spec.split(','):
+        op, _, weight = part.partition('=')
+        op = op.strip()
+        if op not in ("read", "scan", "write", "tables"):
+            raise ValueError(f"Unknown operation in mix: {op}")
+        mix[op] = float(weight)
+    return mix
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Concurrent load test for the /api/query service.")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client threads")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run (ignored with --requests)")
+    parser.add_argument("--requests", type=int, default=None, help="requests per client")
+    parser.add_argument("--mix", type=parse_mix, default=None, help="e.g. read=70,scan=10,write=15,tables=5")
+    parser.add_argument("--seed-rows", type=int, default=1000, help="rows preloaded into the test table")
+    parser.add_argument("--layout", choices=("file", "directory", "paged"), default="file")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run(args.clients, args.duration, args.requests, args.mix, args.seed_rows, layout=args.layout)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+if __name__ == '__main__':
+    main()
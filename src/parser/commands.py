@@ -6,6 +6,15 @@ from src.db.table import ColumnType
 class CreateTableCommand:
     table_name: str
     columns: List[Dict[str, Any]] # format: {name, type, is_primary, is_unique}
+    partition_key: Optional[str] = None  # PARTITION BY HASH (col) PARTITIONS n
+    partitions: int = 0
+
+@dataclass
+class CreateIndexCommand:
+    index_name: str
+    table_name: str
+    columns: List[str] # key columns
+    include: List[str] # extra columns stored in the index (covering)
 
 @dataclass
 class InsertCommand:
@@ -18,6 +27,7 @@ class SelectCommand:
     columns: List[str] # "*" or specific columns
     where: Optional[Dict[str, Any]] = None
     join: Optional[Dict[str, str]] = None # format: {table: "other_table", on_col: "col", target_col: "target_col"}
+    aggregates: Optional[List[Dict[str, str]]] = None # format: [{func: "SUM", column: "amount", label: "SUM(amount)"}]
 
 
 @dataclass
@@ -30,3 +40,25 @@ class UpdateCommand:
 class DeleteCommand:
     table_name: str
     where: Optional[Dict[str, Any]] = None
+
+@dataclass
+class BeginCommand:
+    pass
+
+@dataclass
+class CommitCommand:
+    pass
+
+@dataclass
+class RollbackCommand:
+    pass
+
+@dataclass
+class CreateViewCommand:
+    view_name: str
+    select: SelectCommand
+    sql: str # the defining SELECT, kept so the view can be re-created on load
+
+@dataclass
+class RefreshViewCommand:
+    view_name: str
@@ -1,11 +1,16 @@
 import re
-from typing import Any, Union, Dict
+from typing import Any, Union, Dict, List, Optional
 from src.db.table import ColumnType
+from src.db.aggregate import AGGREGATE_FUNCTIONS
 from .commands import (
     CreateTableCommand, InsertCommand, SelectCommand, 
-    UpdateCommand, DeleteCommand
+    UpdateCommand, DeleteCommand, BeginCommand, CommitCommand, RollbackCommand,
+    CreateIndexCommand, CreateViewCommand, RefreshViewCommand
 )
 
+# Decimal literals such as 2.5 or -3; float() alone would also accept 'nan' and 'inf'
+_DECIMAL = re.compile(r'-?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?')
+
 class SQLParser:
     def parse(self, query: str) -> Any:
         query = query.strip().rstrip(';')
@@ -17,6 +22,21 @@ class SQLParser:
         if re.match(r'^CREATE TABLE', query, re.IGNORECASE):
             return self._parse_create(query)
         
+        # CREATE INDEX name ON table_name (col1, ...) [INCLUDE (col2, ...)]
+        elif re.match(r'^CREATE INDEX', query, re.IGNORECASE):
+            return self._parse_create_index(query)
+        
+        # CREATE MATERIALIZED VIEW name AS SELECT ...
+        elif re.match(r'^CREATE MATERIALIZED VIEW', query, re.IGNORECASE):
+            return self._parse_create_view(query)
+
+        # REFRESH MATERIALIZED VIEW name
+        elif re.match(r'^REFRESH MATERIALIZED VIEW', query, re.IGNORECASE):
+            match = re.match(r'^REFRESH MATERIALIZED VIEW\s+(\w+)$', query, re.IGNORECASE)
+            if not match:
+                raise ValueError("Invalid REFRESH MATERIALIZED VIEW syntax")
+            return RefreshViewCommand(match.group(1))
+        
         # INSERT INTO table_name (col1, col2) VALUES (val1, val2)
         elif re.match(r'^INSERT INTO', query, re.IGNORECASE):
             return self._parse_insert(query)
@@ -33,10 +53,29 @@ class SQLParser:
         elif re.match(r'^DELETE FROM', query, re.IGNORECASE):
             return self._parse_delete(query)
 
+        # BEGIN / COMMIT / ROLLBACK [TRANSACTION | WORK]
+        elif re.match(r'^(BEGIN|START TRANSACTION)(\s+(TRANSACTION|WORK))?$', query, re.IGNORECASE):
+            return BeginCommand()
+
+        elif re.match(r'^COMMIT(\s+(TRANSACTION|WORK))?$', query, re.IGNORECASE):
+            return CommitCommand()
+
+        elif re.match(r'^ROLLBACK(\s+(TRANSACTION|WORK))?$', query, re.IGNORECASE):
+            return RollbackCommand()
+
         else:
             raise ValueError("Unsupported SQL command or syntax error")
 
     def _parse_create(self, query: str) -> CreateTableCommand:
+        # Optional trailing PARTITION BY HASH (col) PARTITIONS n
+        partition_key, partitions = None, 0
+        partition = re.search(r'\)\s*PARTITION BY HASH\s*\(\s*(\w+)\s*\)\s*PARTITIONS\s+(\d+)\s*$', query, re.IGNORECASE)
+        if partition:
+            partition_key, partitions = partition.group(1), int(partition.group(2))
+            query = query[:partition.start() + 1]
+            if partitions < 1:
+                raise ValueError("PARTITIONS must be at least 1")
+
         # Regex to capture table name and columns part
         match = re.search(r'CREATE TABLE\s+(\w+)\s*\((.+)\)', query, re.IGNORECASE | re.DOTALL)
         if not match:
@@ -77,7 +116,25 @@ class SQLParser:
                 "nullable": not is_not_null
             })
             
-        return CreateTableCommand(table_name, columns)
+        if partition_key is not None and partition_key not in [c["name"] for c in columns]:
+            raise ValueError(f"Partition key '{partition_key}' is not a column")
+        return CreateTableCommand(table_name, columns, partition_key, partitions)
+
+    def _parse_create_index(self, query: str) -> CreateIndexCommand:
+        match = re.search(r'CREATE INDEX\s+(\w+)\s+ON\s+(\w+)\s*\(([^)]+)\)(?:\s+INCLUDE\s*\(([^)]+)\))?\s*$', query, re.IGNORECASE)
+        if not match:
+            raise ValueError("Invalid CREATE INDEX syntax")
+        
+        columns = [c.strip() for c in match.group(3).split(',')]
+        include = [c.strip() for c in match.group(4).split(',')] if match.group(4) else []
+        return CreateIndexCommand(match.group(1), match.group(2), columns, include)
+
+    def _parse_create_view(self, query: str) -> CreateViewCommand:
+        match = re.match(r'^CREATE MATERIALIZED VIEW\s+(\w+)\s+AS\s+(SELECT\s.+)$', query, re.IGNORECASE | re.DOTALL)
+        if not match:
+            raise ValueError("Invalid CREATE MATERIALIZED VIEW syntax")
+        sql = match.group(2).strip()
+        return CreateViewCommand(match.group(1), self._parse_select(sql), sql)
 
     def _parse_insert(self, query: str) -> InsertCommand:
         match = re.search(r'INSERT INTO\s+(\w+)\s*\((.+?)\)\s*VALUES\s*\((.+?)\)', query, re.IGNORECASE)
@@ -157,19 +214,42 @@ class SQLParser:
                 }
         
         where = self._parse_where(where_clause) if where_clause else None
+        aggregates = self._parse_aggregates(columns)
+        
+        return SelectCommand(table_name, columns, where, join_data, aggregates)
+
+    def _parse_aggregates(self, columns: List[str]) -> Optional[List[Dict[str, str]]]:
+        # COUNT(*), COUNT(col), SUM(col), AVG(col), MIN(col), MAX(col)
+        pattern = r'^(' + '|'.join(AGGREGATE_FUNCTIONS) + r')\s*\(\s*(\*|\w+)\s*\)$'
+        aggregates = []
+        for col in columns:
+            match = re.match(pattern, col, re.IGNORECASE)
+            if not match:
+                continue
+            func = match.group(1).upper()
+            target = match.group(2)
+            if target == "*" and func != "COUNT":
+                raise ValueError(f"{func}(*) is not supported")
+            aggregates.append({"func": func, "column": target, "label": f"{func}({target})"})
         
-        return SelectCommand(table_name, columns, where, join_data)
+        if aggregates and len(aggregates) != len(columns):
+            raise ValueError("Cannot mix aggregates and plain columns (GROUP BY is not supported)")
+        return aggregates or None
         
     def _parse_where(self, where_str: str) -> Dict[str, Any]:
-        # Very simple WHERE parser: col = val
-        match = re.search(r'(\w+)\s*=\s*(.+)', where_str)
-        if not match:
-            return {}
-        key = match.group(1)
-        val = match.group(2).strip().strip("'\"")
-        
-        if val.isdigit(): val = int(val)
-        return {key: val}
+        # Very simple WHERE parser: col = val [AND col = val ...]
+        conditions = {}
+        for part in re.split(r'\s+AND\s+(?=\w+\s*=)', where_str, flags=re.IGNORECASE):
+            match = re.search(r'(\w+)\s*=\s*(.+)', part)
+            if not match:
+                continue
+            key = match.group(1)
+            val = match.group(2).strip().strip("'\"")
+            
+            if val.isdigit(): val = int(val)
+            elif _DECIMAL.fullmatch(val): val = float(val)  # same types as INSERT values
+            conditions[key] = val
+        return conditions
 
     def _parse_update(self, query: str) -> UpdateCommand:
         # UPDATE table SET col=val WHERE ...
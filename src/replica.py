@@ -0,0 +1,33 @@
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+# Add project root to sys.path to allow running as script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.app as web
+from src.db.replication import Follower
+
+def parse_address(spec: str):
+    host, _, port = spec.rpartition(':')
+    return (host or "127.0.0.1", int(port))
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve read-only queries from a replica of a primary database.")
+    parser.add_argument("--primary", type=parse_address, required=True, help="primary's replication address, e.g. 127.0.0.1:7070")
+    parser.add_argument("--port", type=int, default=3001, help="HTTP port for this replica")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for the initial snapshot")
+    args = parser.parse_args(argv)
+
+    follower = Follower(args.primary).start()
+    if not follower.wait_for(0, timeout=args.timeout):
+        sys.exit(f"No snapshot from primary {args.primary[0]}:{args.primary[1]} after {args.timeout}s")
+    follower.db.query_limits = web.env_query_limits()
+    web.db = follower.db
+    web.replication = follower
+    print(f"Replica of {args.primary[0]}:{args.primary[1]} serving on port {args.port}")
+    web.app.run(port=args.port, threaded=True)
+
+if __name__ == '__main__':
+    main()
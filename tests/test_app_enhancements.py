@@ -1,3 +1,6 @@
+import os
+import subprocess
+import sys
 import pytest
 from src.app import app
 from src.db.core import Database
@@ -11,8 +14,8 @@ def client():
 def test_get_tables_empty(client):
     """Test fetching tables when database is empty."""
     # Reset DB for test
-    from src.app import db
-    db.tables = {} 
+    from src.app import get_db
+    get_db().tables = {}
     
     rv = client.get('/api/tables')
     assert rv.status_code == 200
@@ -38,3 +41,27 @@ def test_get_tables_populated(client):
     assert "users" in tables
     assert len(tables["users"]["columns"]) == 2
     assert tables["users"]["columns"][0]["name"] == "id"
+
+def test_transactions_cannot_span_requests(client):
+    rv = client.post('/api/query', json={'query': 'BEGIN'})
+    assert rv.status_code == 400
+    from src.app import get_db
+    db = get_db()
+    assert not db.in_transaction
+
+def test_failed_script_still_flushes_what_it_committed(client):
+    from src.app import get_db
+    db = get_db()
+    client.post('/api/query', json={'query': "CREATE TABLE flushed (id INT PRIMARY KEY)"})
+    script = "BEGIN; INSERT INTO flushed (id) VALUES (1); COMMIT; INSERT INTO flushed (id) VALUES (1)"
+    rv = client.post('/api/query', json={'query': script})
+    assert rv.status_code == 400 and "Duplicate" in rv.json["error"]
+    assert db.execute_query("SELECT * FROM flushed") == [{"id": 1}]
+    assert db._flushed_seq == db._commit_seq
+
+def test_importing_the_app_loads_no_database(tmp_path):
+    # replica.py and loadtest.py import the app to serve a database of their own
+    (tmp_path / "db.json").write_text('{"tables": {}}')
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    code = "import src.app as web; assert web.db is None; assert web.get_db() is web.db"
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=dict(os.environ, PYTHONPATH=root), check=True)
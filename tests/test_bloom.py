@@ -0,0 +1,51 @@
+import pytest
+from src.db.bloom import BloomFilter
+from src.db.core import Database
+
+def test_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter.from_keys(range(0, 20000, 2), 10000, bits_per_key=10)
+    assert all(k in bloom for k in range(0, 20000, 2))
+    false_positives = sum(1 for k in range(1, 20000, 2) if k in bloom)
+    assert false_positives / 10000 < 0.03
+
+def test_equal_values_share_bits():
+    bloom = BloomFilter.from_keys([1, "KE"], 2)
+    assert 1.0 in bloom
+    assert "KE" in bloom
+
+def make_db():
+    db = Database(":memory:")
+    db.execute_query("CREATE TABLE orders (id INT PRIMARY KEY, customer STRING)")
+    db.execute_query("CREATE TABLE refunds (rid INT PRIMARY KEY, order_id INT, amount INT)")
+    db.execute_query(";".join(
+        f"INSERT INTO orders (id, customer) VALUES ({i}, 'c{i % 7}')" for i in range(3000)))
+    db.execute_query(";".join(
+        f"INSERT INTO refunds (rid, order_id, amount) VALUES ({i}, {i * 97}, {i})" for i in range(30)))
+    return db
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM orders JOIN refunds ON orders.id = refunds.order_id",
+    "SELECT id, amount FROM orders JOIN refunds ON orders.id = refunds.order_id WHERE customer='c3'",
+    "SELECT * FROM refunds JOIN orders ON refunds.order_id = orders.id",
+])
+def test_bloom_reduction_preserves_results(sql):
+    db = make_db()
+    db.join_bloom_bits_per_key = 0
+    expected = db.execute_query(sql)
+    db.join_bloom_bits_per_key = 10
+    assert db.execute_query(sql) == expected
+    assert len(expected) > 0
+
+def test_bloom_reduction_shrinks_inputs(monkeypatch):
+    db = make_db()
+    sizes = []
+    original = db._bloom_reduce
+    def spy(*args):
+        left, right = original(*args)
+        sizes.append((len(args[0]), len(left)))
+        return left, right
+    monkeypatch.setattr(db, "_bloom_reduce", spy)
+    db.execute_query("SELECT * FROM orders JOIN refunds ON orders.id = refunds.order_id")
+    (before, after), = sizes
+    assert before == 3000
+    assert after < 100
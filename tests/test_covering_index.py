@@ -0,0 +1,78 @@
+import pytest
+from src.db.core import Database
+from src.db.table import Table
+from src.parser.parser import SQLParser
+from src.parser.commands import CreateIndexCommand
+
+@pytest.fixture
+def db():
+    db = Database(":memory:")
+    db.execute_query("CREATE TABLE users (id INT PRIMARY KEY, email STRING, country STRING, age INT)")
+    for i in range(10):
+        db.execute_query(f"INSERT INTO users (id, email, country, age) VALUES ({i}, 'u{i}@x.com', 'c{i % 3}', {20 + i})")
+    return db
+
+def no_row_access(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("table rows were scanned")
+    monkeypatch.setattr(Table, "select", fail)
+
+def test_parse_create_index():
+    cmd = SQLParser().parse("CREATE INDEX idx_email ON users (email) INCLUDE (id, age)")
+    assert cmd == CreateIndexCommand("idx_email", "users", ["email"], ["id", "age"])
+    cmd = SQLParser().parse("create index idx_cc ON users (country, age)")
+    assert cmd.columns == ["country", "age"] and cmd.include == []
+
+def test_parse_where_with_and():
+    cmd = SQLParser().parse("SELECT id FROM users WHERE country='c1' AND age=21")
+    assert cmd.where == {"country": "c1", "age": 21}
+
+def test_index_only_scan(db, monkeypatch):
+    assert db.execute_query("CREATE INDEX idx_email ON users (email) INCLUDE (id)") == "Index 'idx_email' created."
+    expected = db.execute_query("SELECT id, email FROM users WHERE email='u4@x.com'")
+    assert expected == [{"id": 4, "email": "u4@x.com"}]
+
+    no_row_access(monkeypatch)
+    assert db.execute_query("SELECT email, id FROM users WHERE email='u4@x.com'") == expected
+    assert db.execute_query("SELECT id FROM users WHERE email='nobody'") == []
+
+def test_composite_index(db, monkeypatch):
+    db.execute_query("CREATE INDEX idx_cc ON users (country, age) INCLUDE (email)")
+    no_row_access(monkeypatch)
+    assert db.execute_query("SELECT email FROM users WHERE country='c1' AND age=24") == [{"email": "u4@x.com"}]
+
+def test_uncovered_queries_use_rows(db):
+    db.execute_query("CREATE INDEX idx_email ON users (email) INCLUDE (id)")
+    assert db.execute_query("SELECT age FROM users WHERE email='u4@x.com'") == [{"age": 24}]
+    assert len(db.execute_query("SELECT id FROM users WHERE country='c0'")) == 4
+
+def test_index_maintained_by_writes(db, monkeypatch):
+    db.execute_query("CREATE INDEX idx_country ON users (country) INCLUDE (id)")
+    db.execute_query("INSERT INTO users (id, email, country, age) VALUES (10, 'new@x.com', 'c9', 30)")
+    db.execute_query("UPDATE users SET country='c9' WHERE id=1")
+    db.execute_query("DELETE FROM users WHERE id=10")
+    db.execute_query("BEGIN")
+    db.execute_query("UPDATE users SET country='c9' WHERE id=2")
+    db.execute_query("ROLLBACK")
+
+    no_row_access(monkeypatch)
+    assert db.execute_query("SELECT id FROM users WHERE country='c9'") == [{"id": 1}]
+
+def test_index_errors(db):
+    assert db.execute_query("CREATE INDEX i ON users (nope)").startswith("Error:")
+    db.execute_query("CREATE INDEX i ON users (email)")
+    assert db.execute_query("CREATE INDEX i ON users (age)").startswith("Error:")
+
+def test_index_persisted(tmp_path, monkeypatch):
+    path = tmp_path / "db"
+    db = Database(str(path), layout="paged")
+    db.execute_query("CREATE TABLE users (id INT PRIMARY KEY, email STRING)")
+    db.execute_query("INSERT INTO users (id, email) VALUES (1, 'a@x.com')")
+    db.execute_query("CREATE INDEX idx_email ON users (email) INCLUDE (id)")
+    db.save()
+
+    monkeypatch.setattr(Table, "rebuild_indexes", lambda self: pytest.fail("index was rebuilt"))
+    reloaded = Database(str(path), layout="paged")
+    reloaded.load()
+    no_row_access(monkeypatch)
+    assert reloaded.execute_query("SELECT id FROM users WHERE email='a@x.com'") == [{"id": 1}]
@@ -0,0 +1,98 @@
+import json
+from src.db.core import Database
+from src.db.table import Table, Column, ColumnType, StringDictionary
+
+def make_orders():
+    t = Table("orders", [
+        Column("id", ColumnType.INTEGER, is_primary=True),
+        Column("country", ColumnType.STRING),
+        Column("status", ColumnType.STRING, nullable=True)
+    ])
+    for i in range(100):
+        t.insert({"id": i, "country": ["KE", "UG", "TZ"][i % 3], "status": "paid" if i % 2 else None})
+    return t
+
+def test_dictionary_codes_are_stable():
+    d = StringDictionary()
+    assert d.encode("KE") == 0
+    assert d.encode("UG") == 1
+    assert d.encode("KE") == 0
+    assert d.lookup("TZ") is None
+    assert d.lookup(5) is None
+
+def test_rows_share_one_object_per_value():
+    t = make_orders()
+    countries = {id(row["country"]) for row in t.rows}
+    assert len(countries) == 3
+
+def test_string_predicates_use_dictionary():
+    t = make_orders()
+    assert len(t.select({"country": "KE"})) == 34
+    assert len(t.select({"country": "KE", "status": "paid"})) == 17
+    assert t.select({"country": "NG"}) == []
+    # A freshly built string (not the interned object) still matches
+    assert len(t.select({"country": "".join(["K", "E"])})) == 34
+
+def test_snapshot_stores_codes_and_round_trips():
+    t = make_orders()
+    data = t.to_dict()
+    assert data["dictionaries"]["country"] == ["KE", "UG", "TZ"]
+    assert data["rows"][1] == {"id": 1, "country": 1, "status": 0}
+    assert data["rows"][0]["status"] is None
+
+    restored = Table.from_dict(json.loads(json.dumps(data)))
+    assert restored.rows == t.rows
+    assert len(restored.select({"country": "TZ"})) == 33
+
+def test_plain_string_snapshots_still_load():
+    data = make_orders().to_dict()
+    data.pop("dictionaries")
+    data["rows"] = [{"id": 1, "country": "KE", "status": None}]
+    restored = Table.from_dict(data)
+    assert restored.select({"country": "KE"}) == [{"id": 1, "country": "KE", "status": None}]
+
+def test_update_and_join_on_encoded_columns():
+    db = Database(":memory:")
+    db.execute_query("CREATE TABLE orders (id INT PRIMARY KEY, currency STRING)")
+    db.execute_query("CREATE TABLE rates (currency STRING PRIMARY KEY, rate INT)")
+    db.execute_query("INSERT INTO orders (id, currency) VALUES (1, 'KES')")
+    db.execute_query("INSERT INTO orders (id, currency) VALUES (2, 'USD')")
+    db.execute_query("INSERT INTO rates (currency, rate) VALUES ('USD', 130)")
+
+    db.execute_query("UPDATE orders SET currency='USD' WHERE id=1")
+    assert len(db.execute_query("SELECT * FROM orders WHERE currency='USD'")) == 2
+
+    res = db.execute_query("SELECT id, rate FROM orders JOIN rates ON orders.currency = rates.currency")
+    assert sorted(r["id"] for r in res) == [1, 2]
+    assert all(r["rate"] == 130 for r in res)
+
+def test_key_columns_are_not_encoded():
+    t = Table("rates", [Column("currency", ColumnType.STRING, is_primary=True),
+                        Column("code", ColumnType.STRING, is_unique=True),
+                        Column("region", ColumnType.STRING)])
+    assert list(t._dictionaries) == ["region"]
+    t.insert({"currency": "USD", "code": "840", "region": "NA"})
+    data = t.to_dict()
+    assert data["rows"] == [{"currency": "USD", "code": "840", "region": 0}]
+    # Snapshots from before key columns were plain strings still load
+    data["dictionaries"]["currency"] = ["USD"]
+    data["rows"][0]["currency"] = 0
+    assert Table.from_dict(data).select({"currency": "USD"})[0]["region"] == "NA"
+
+def test_dictionaries_are_compacted_on_save():
+    t = make_orders()
+    t.update(t.select({"country": "UG"}), {"country": "KE"})
+    assert t._dictionaries["country"].values == ["KE", "UG", "TZ"]
+    data = t.to_dict()
+    assert data["dictionaries"]["country"] == ["KE", "TZ"]
+    assert t._dictionaries["country"].values == ["KE", "TZ"]
+    assert len(t.select({"country": "KE"})) == 67 and t.select({"country": "UG"}) == []
+    assert Table.from_dict(json.loads(json.dumps(data))).rows == t.rows
+
+    # Loading an uncompacted snapshot drops unused values too
+    data["dictionaries"]["country"] = ["gone", "KE", "TZ"]
+    for row in data["rows"]:
+        row["country"] += 1
+    restored = Table.from_dict(data)
+    assert restored._dictionaries["country"].values == ["KE", "TZ"]
+    assert restored.rows == t.rows
@@ -0,0 +1,97 @@
+import json
+import os
+import pytest
+from src.db.core import Database
+from src.db.table import Table
+
+@pytest.fixture
+def saved_dir(tmp_path):
+    path = tmp_path / "db"
+    db = Database(str(path), layout="paged")
+    db.execute_query("CREATE TABLE users (id INT PRIMARY KEY, email STRING UNIQUE, name STRING)")
+    for i in range(20):
+        db.execute_query(f"INSERT INTO users (id, email, name) VALUES ({i}, 'u{i}@x.com', 'user')")
+    db.save()
+    return path
+
+def index_file(path):
+    with open(os.path.join(path, "catalog.json")) as f:
+        return os.path.join(path, json.load(f)["tables"]["users"]["index_file"])
+
+def load(path, monkeypatch):
+    rebuilds = []
+    original = Table.rebuild_indexes
+    monkeypatch.setattr(Table, "rebuild_indexes", lambda self: rebuilds.append(self.name) or original(self))
+    db = Database(str(path), layout="paged")
+    db.load()
+    return db, rebuilds
+
+def assert_constraints_enforced(db):
+    assert db.execute_query("INSERT INTO users (id, email, name) VALUES (5, 'new@x.com', 'dup')").startswith("Error:")
+    assert db.execute_query("INSERT INTO users (id, email, name) VALUES (99, 'u7@x.com', 'dup')").startswith("Error:")
+    assert db.execute_query("INSERT INTO users (id, email, name) VALUES (99, 'new@x.com', 'ok')") == "Row inserted."
+
+def test_valid_index_file_is_loaded_without_rebuild(saved_dir, monkeypatch):
+    db, rebuilds = load(saved_dir, monkeypatch)
+    assert rebuilds == []
+    assert db.tables["users"]._primary_key_index[7] == 7
+    assert_constraints_enforced(db)
+
+def test_missing_index_file_triggers_rebuild(saved_dir, monkeypatch):
+    os.remove(index_file(saved_dir))
+    db, rebuilds = load(saved_dir, monkeypatch)
+    assert rebuilds == ["users"]
+    assert_constraints_enforced(db)
+
+def test_corrupt_index_file_triggers_rebuild(saved_dir, monkeypatch):
+    path = index_file(saved_dir)
+    with open(path) as f:
+        data = json.load(f)
+    data["primary"][0][1] = 42  # checksum no longer matches
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+    db, rebuilds = load(saved_dir, monkeypatch)
+    assert rebuilds == ["users"]
+    assert_constraints_enforced(db)
+
+def test_stale_index_version_triggers_rebuild(saved_dir, monkeypatch):
+    path = index_file(saved_dir)
+    with open(path) as f:
+        data = json.load(f)
+    data["version"] -= 1
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+    _, rebuilds = load(saved_dir, monkeypatch)
+    assert rebuilds == ["users"]
+
+@pytest.mark.parametrize("layout", ["directory", "file"])
+def test_in_memory_tables_rebuild_indexes(tmp_path, monkeypatch, layout):
+    # Rebuilding from rows already in memory is faster than parsing saved indexes
+    path = tmp_path / ("db" if layout == "directory" else "db.json")
+    db = Database(str(path), layout=layout)
+    db.execute_query("CREATE TABLE t (id INT PRIMARY KEY)")
+    db.execute_query("INSERT INTO t (id) VALUES (1)")
+    db.save()
+    if layout == "directory":
+        assert not [name for name in os.listdir(path) if name.endswith(".idx.json")]
+
+    rebuilds = []
+    original = Table.rebuild_indexes
+    monkeypatch.setattr(Table, "rebuild_indexes", lambda self: rebuilds.append(self.name) or original(self))
+    db2 = Database(str(path), layout=layout)
+    db2.load()
+    assert rebuilds == ["t"]
+    assert db2.tables["t"]._primary_key_index == {1: 0}
+
+def test_delete_keeps_indexes_consistent():
+    db = Database(":memory:")
+    db.execute_query("CREATE TABLE t (id INT PRIMARY KEY, code STRING UNIQUE)")
+    for i in range(5):
+        db.execute_query(f"INSERT INTO t (id, code) VALUES ({i}, 'c{i}')")
+    db.execute_query("DELETE FROM t WHERE id=2")
+    table = db.tables["t"]
+    assert table._primary_key_index == {0: 0, 1: 1, 3: 2, 4: 3}
+    assert table._unique_indices["code"]["c4"] == 3
+    assert db.execute_query("INSERT INTO t (id, code) VALUES (2, 'c2')") == "Row inserted."
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+import pytest
+from src.db.core import Database
+from src.db.limits import QueryHandle, QueryLimits
+
+N = 2000
+
+@pytest.fixture
+def db():
+    db = Database(":memory:")
+    db.join_bloom_bits_per_key = 0  # keep the full nested loop
+    db.execute_query("CREATE TABLE a (id INT, k INT)")
+    db.execute_query("CREATE TABLE b (id INT, k INT)")
+    db.bulk_insert("a", [{"id": i, "k": i % 3} for i in range(N)])
+    db.bulk_insert("b", [{"id": i, "k": i % 3} for i in range(N)])
+    return db
+
+JOIN = "SELECT * FROM a JOIN b ON a.k = b.k"
+
+def test_limits_combine():
+    assert QueryLimits(timeout=5).tighten(QueryLimits(timeout=10, max_result_rows=3)) == \
+        QueryLimits(timeout=5, max_result_rows=3)
+    assert QueryLimits.from_dict({"timeout": "0.5", "max_result_rows": None}) == QueryLimits(timeout=0.5)
+    for bad in [{"nope": 1}, {"timeout": 0}, {"max_scanned_rows": "many"}]:
+        with pytest.raises(ValueError):
+            QueryLimits.from_dict(bad)
+
+def test_timeout_stops_join(db):
+    start = time.monotonic()
+    assert db.execute_query(JOIN, limits=QueryLimits(timeout=0.05)) == "Error: Query timed out after 0.05s"
+    assert time.monotonic() - start < 2
+
+def test_scanned_rows(db):
+    limits = QueryLimits(max_scanned_rows=N * 10)
+    assert db.execute_query(JOIN, limits=limits) == f"Error: Query scanned more than {N * 10} rows"
+    assert len(db.execute_query("SELECT * FROM a WHERE k=1", limits=limits)) == 667
+    db.query_limits = QueryLimits(max_scanned_rows=N - 1)
+    assert "scanned more than" in db.execute_query("SELECT * FROM a")
+    # a connection can't lift the global limit
+    assert "scanned more than" in db.execute_query("SELECT * FROM a", limits=QueryLimits(max_scanned_rows=N))
+
+def test_result_size(db):
+    assert db.execute_query(JOIN, limits=QueryLimits(max_result_rows=100)) == "Error: Query result exceeds 100 rows"
+    assert db.execute_query("SELECT id FROM a", limits=QueryLimits(max_result_bytes=1000)) == \
+        "Error: Query result exceeds 1000 bytes"
+    assert db.execute_query("SELECT id FROM a WHERE id=1", limits=QueryLimits(max_result_rows=1)) == [{"id": 1}]
+
+def test_join_result_limits_apply_to_returned_rows(db):
+    projected = "SELECT id FROM a JOIN b ON a.k = b.k WHERE id=1"
+    result = db.execute_query(projected)
+    size = sum(len(json.dumps(row)) for row in result)
+    # The joined rows are much wider, but only the id column is returned
+    assert db.execute_query(projected, limits=QueryLimits(max_result_bytes=size)) == result
+    assert "exceeds" in db.execute_query(projected, limits=QueryLimits(max_result_bytes=size // 2))
+    # Aggregated joins return one row however many rows they join
+    assert db.execute_query("SELECT COUNT(*) FROM a JOIN b ON a.k = b.k", limits=QueryLimits(max_result_rows=1)) == \
+        [{"COUNT(*)": N * N // 3 + 1}]
+
+def test_writes_ignore_result_limits(db):
+    db.execute_query("CREATE MATERIALIZED VIEW ks AS SELECT k FROM a")
+    limits = QueryLimits(max_result_rows=1)
+    assert db.execute_query("INSERT INTO a (id, k) VALUES (5000, 1)", limits=limits) == "Row inserted."
+    assert db.execute_query("UPDATE a SET k=2 WHERE id=5000", limits=limits) == "Updated 1 rows."
+
+def test_abort_rolls_back_script(db):
+    result = db.execute_query(f"INSERT INTO a (id, k) VALUES (9999, 0); {JOIN}", limits=QueryLimits(max_result_rows=10))
+    assert "exceeds 10 rows" in result
+    assert db.execute_query("SELECT * FROM a WHERE id=9999") == []
+
+def test_cancel_from_another_thread(db):
+    handle = QueryHandle()
+    timer = threading.Timer(0.05, handle.cancel)
+    timer.start()
+    try:
+        assert db.execute_query(JOIN, handle=handle) == "Error: Query cancelled"
+    finally:
+        timer.cancel()
+    # the lock was released and later queries run unguarded
+    assert len(db.execute_query("SELECT * FROM a")) == N
+
+def test_api_cancel():
+    pytest.importorskip("flask")
+    from src import app as app_module
+    client = app_module.app.test_client()
+    assert client.post('/api/query/nope/cancel').status_code == 404
+    rv = client.post('/api/query', json={'query': 'SELECT 1', 'limits': {'timeout': -1}})
+    assert rv.status_code == 400 and "Invalid limits" in rv.json["error"]
+
+    handles = []
+    db = app_module.get_db()
+    original = db.execute_query
+    db.execute_query = lambda sql, **kw: handles.append(kw["handle"]) or original(sql, **kw)
+    try:
+        client.post('/api/query', json={'query': 'SELECT 1'})
+        client.post('/api/query', json={'query': 'SELECT 1', 'query_id': 'q0'})
+    finally:
+        db.execute_query = original
+    # Only queries that can be cancelled pay for the checks
+    assert handles[0] is None and isinstance(handles[1], QueryHandle)
+
+    handle = QueryHandle()
+    app_module.running_queries["q1"] = handle
+    try:
+        assert client.post('/api/query/q1/cancel').status_code == 200
+    finally:
+        app_module.running_queries.pop("q1", None)
+    assert handle.cancelled
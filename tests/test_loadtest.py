@@ -0,0 +1,25 @@
+import pytest
+from src.loadtest import percentile, parse_mix, run
+
+def test_percentile_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([], 95) == 0.0
+    assert percentile([1, 2, 3, 4, 5], 50) == 3
+    assert percentile([1, 2, 3, 4, 5], 0) == 1
+    assert percentile([1, 2, 3, 4, 5], 100) == 5
+
+def test_parse_mix():
+    assert parse_mix("read=70,write=30") == {"read": 70.0, "write": 30.0}
+    with pytest.raises(ValueError):
+        parse_mix("drop=1")
+
+def test_short_run_reports_all_operations(tmp_path):
+    report = run(clients=2, requests=20, seed_rows=50, db_path=str(tmp_path / "lt.json"),
+                 mix={"read": 1, "scan": 1, "write": 1, "tables": 1})
+    assert report["overall"]["requests"] == 40
+    assert report["overall"]["errors"] == 0
+    assert set(report["operations"]) <= {"read", "scan", "write", "tables"}
+    assert report["throughput_rps"] > 0
+    assert "db.sync" in report["server_time"]
@@ -0,0 +1,134 @@
+import pytest
+from src.db.core import Database
+from src.db.views import MaterializedView
+from src.parser.parser import SQLParser
+from src.parser.commands import CreateViewCommand, RefreshViewCommand
+
+def populate(db):
+    db.execute_query("CREATE TABLE users (id INT PRIMARY KEY, name STRING, country STRING)")
+    db.execute_query("CREATE TABLE orders (oid INT PRIMARY KEY, user_id INT, amount INT)")
+    db.execute_query("INSERT INTO users (id, name, country) VALUES (1, 'Alice', 'NL')")
+    db.execute_query("INSERT INTO users (id, name, country) VALUES (2, 'Bob', 'DE')")
+    db.execute_query("INSERT INTO orders (oid, user_id, amount) VALUES (10, 1, 5)")
+    db.execute_query("INSERT INTO orders (oid, user_id, amount) VALUES (11, 2, 7)")
+    return db
+
+@pytest.fixture
+def db():
+    return populate(Database(":memory:"))
+
+def recompute(db, name):
+    """Rows the view would have if it were rebuilt from scratch."""
+    view = db.views[name]
+    return db.execute_query(view.sql)
+
+def check(db, name):
+    stored = db.execute_query(f"SELECT * FROM {name}")
+    expected = recompute(db, name)
+    key = lambda r: sorted(r.items())
+    assert sorted(stored, key=key) == sorted(expected, key=key)
+    return stored
+
+def test_parse_view_commands():
+    cmd = SQLParser().parse("CREATE MATERIALIZED VIEW nl AS SELECT id, name FROM users WHERE country='NL'")
+    assert isinstance(cmd, CreateViewCommand)
+    assert cmd.view_name == "nl" and cmd.select.table_name == "users"
+    assert cmd.sql == "SELECT id, name FROM users WHERE country='NL'"
+    assert SQLParser().parse("REFRESH MATERIALIZED VIEW nl") == RefreshViewCommand("nl")
+
+def test_filtered_view_tracks_writes(db):
+    assert db.execute_query("CREATE MATERIALIZED VIEW nl AS SELECT id, name FROM users WHERE country='NL'") == \
+        "Materialized view 'nl' created."
+    assert check(db, "nl") == [{"id": 1, "name": "Alice"}]
+
+    db.execute_query("INSERT INTO users (id, name, country) VALUES (3, 'Carol', 'NL')")
+    db.execute_query("UPDATE users SET country='NL' WHERE id=2")
+    db.execute_query("UPDATE users SET name='Alicia' WHERE id=1")
+    db.execute_query("DELETE FROM users WHERE id=3")
+    assert sorted(check(db, "nl"), key=lambda r: r["id"]) == [{"id": 1, "name": "Alicia"}, {"id": 2, "name": "Bob"}]
+
+def test_join_view_tracks_both_sides(db):
+    db.execute_query("CREATE MATERIALIZED VIEW uo AS SELECT name, amount FROM users JOIN orders ON users.id = orders.user_id")
+    check(db, "uo")
+    db.execute_query("INSERT INTO orders (oid, user_id, amount) VALUES (12, 1, 9)")
+    db.execute_query("INSERT INTO users (id, name, country) VALUES (3, 'Carol', 'NL')")
+    db.execute_query("INSERT INTO orders (oid, user_id, amount) VALUES (13, 3, 1)")
+    db.execute_query("UPDATE users SET name='Robert' WHERE id=2")
+    db.execute_query("DELETE FROM orders WHERE oid=10")
+    rows = check(db, "uo")
+    assert {"name": "Robert", "amount": 7} in rows and len(rows) == 3
+
+def test_aggregate_view_is_maintained_incrementally(db, monkeypatch):
+    db.execute_query("CREATE MATERIALIZED VIEW totals AS SELECT COUNT(*), SUM(amount), AVG(amount), MAX(amount) FROM orders")
+    monkeypatch.setattr(MaterializedView, "refresh", lambda *a: pytest.fail("view was recomputed"))
+    db.execute_query("INSERT INTO orders (oid, user_id, amount) VALUES (12, 1, 9)")
+    db.execute_query("UPDATE orders SET amount=6 WHERE oid=10")
+    db.execute_query("DELETE FROM orders WHERE oid=10")
+    assert check(db, "totals") == [{"COUNT(*)": 2, "SUM(amount)": 16, "AVG(amount)": 8.0, "MAX(amount)": 9}]
+
+def test_deleting_the_extreme_recomputes(db):
+    db.execute_query("CREATE MATERIALIZED VIEW extremes AS SELECT MIN(amount), MAX(amount) FROM orders")
+    db.execute_query("DELETE FROM orders WHERE oid=11")
+    assert check(db, "extremes") == [{"MIN(amount)": 5, "MAX(amount)": 5}]
+    db.execute_query("DELETE FROM orders WHERE oid=10")
+    assert check(db, "extremes") == [{"MIN(amount)": None, "MAX(amount)": None}]
+
+def test_refresh(db):
+    db.execute_query("CREATE MATERIALIZED VIEW nl AS SELECT * FROM users WHERE country='NL'")
+    db.tables["nl"].rows.clear()  # simulate drift
+    assert db.execute_query("REFRESH MATERIALIZED VIEW nl") == "Materialized view 'nl' refreshed."
+    check(db, "nl")
+    assert db.execute_query("REFRESH MATERIALIZED VIEW nope").startswith("Error:")
+
+def test_rollback_restores_view(db):
+    db.execute_query("CREATE MATERIALIZED VIEW totals AS SELECT COUNT(*), SUM(amount) FROM orders")
+    db.execute_query("BEGIN")
+    db.execute_query("INSERT INTO orders (oid, user_id, amount) VALUES (12, 1, 9)")
+    db.execute_query("DELETE FROM orders WHERE oid=10")
+    db.execute_query("ROLLBACK")
+    assert check(db, "totals") == [{"COUNT(*)": 2, "SUM(amount)": 12}]
+    db.execute_query("INSERT INTO orders (oid, user_id, amount) VALUES (12, 1, 1)")
+    assert check(db, "totals") == [{"COUNT(*)": 3, "SUM(amount)": 13}]
+
+def test_deletes_remove_one_equal_row_each(db):
+    db.execute_query("INSERT INTO users (id, name, country) VALUES (3, 'Carol', 'NL')")
+    db.execute_query("INSERT INTO users (id, name, country) VALUES (4, 'Dan', 'NL')")
+    db.execute_query("CREATE MATERIALIZED VIEW countries AS SELECT country FROM users")
+    db.execute_query("DELETE FROM users WHERE id=1")
+    db.execute_query("DELETE FROM users WHERE name='Dan'")
+    assert sorted(r["country"] for r in check(db, "countries")) == ["DE", "NL"]
+
+def test_base_tables_of_a_view_cannot_be_dropped(db):
+    db.execute_query("CREATE MATERIALIZED VIEW uo AS SELECT name, amount FROM users JOIN orders ON users.id = orders.user_id")
+    with pytest.raises(ValueError, match="view 'uo' depends on it"):
+        db.drop_table("orders")
+    assert "orders" in db.tables
+    assert db.execute_query("INSERT INTO users (id, name, country) VALUES (3, 'Carol', 'NL')") == "Row inserted."
+    db.drop_table("uo")
+    db.drop_table("orders")
+    assert "orders" not in db.tables and "uo" not in db.views
+
+def test_failed_create_leaves_nothing(db):
+    assert db.execute_query("CREATE MATERIALIZED VIEW v AS SELECT SUM(nope) FROM orders").startswith("Error:")
+    assert "v" not in db.tables and "v" not in db.views
+
+def test_views_are_read_only(db):
+    db.execute_query("CREATE MATERIALIZED VIEW nl AS SELECT id FROM users WHERE country='NL'")
+    assert db.execute_query("INSERT INTO nl (id) VALUES (5)").startswith("Error:")
+    assert db.execute_query("UPDATE nl SET id=5").startswith("Error:")
+    assert db.execute_query("DELETE FROM nl WHERE id=1").startswith("Error:")
+    assert db.execute_query("CREATE MATERIALIZED VIEW v2 AS SELECT * FROM nl").startswith("Error:")
+
+def test_views_survive_reload(tmp_path):
+    db = populate(Database(str(tmp_path / "db.json")))
+    db.execute_query("CREATE MATERIALIZED VIEW totals AS SELECT COUNT(*), SUM(amount) FROM orders")
+    db.execute_query("CREATE MATERIALIZED VIEW nl AS SELECT id, name FROM users WHERE country='NL'")
+    db.save()
+
+    reloaded = Database(str(tmp_path / "db.json"))
+    reloaded.load()
+    assert set(reloaded.views) == {"totals", "nl"}
+    reloaded.execute_query("INSERT INTO orders (oid, user_id, amount) VALUES (12, 1, 9)")
+    reloaded.execute_query("INSERT INTO users (id, name, country) VALUES (3, 'Carol', 'NL')")
+    assert check(reloaded, "totals") == [{"COUNT(*)": 3, "SUM(amount)": 21}]
+    assert len(check(reloaded, "nl")) == 2
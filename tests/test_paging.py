@@ -0,0 +1,153 @@
+import os
+import pytest
+from src.db.core import Database
+from src.db.paging import BufferPool, PagedTable
+
+PAGE = 1024
+POOL = 8 * PAGE
+
+def paged(path):
+    return Database(str(path), layout="paged", buffer_pool_bytes=POOL, page_size=PAGE)
+
+def populate(db, n=600):
+    db.execute_query("CREATE TABLE items (id INT PRIMARY KEY, name STRING, grp INT, price FLOAT)")
+    db.execute_query(";".join(
+        f"INSERT INTO items (id, name, grp, price) VALUES ({i}, 'item{i}', {i % 7}, {i / 4})" for i in range(n)))
+    return db
+
+def unordered(rows):
+    return sorted(rows, key=str)
+
+WORKLOAD = [
+    "UPDATE items SET name='renamed-with-a-much-longer-name' WHERE grp=3",
+    "DELETE FROM items WHERE grp=5",
+    "INSERT INTO items (id, name, grp, price) VALUES (1000, 'new', 1, 2.5)",
+    "UPDATE items SET price=0.5 WHERE id=10",
+    "UPDATE items SET id=2000 WHERE id=11",
+]
+
+def test_matches_in_memory_tables(tmp_path):
+    db, plain = populate(paged(tmp_path / "db")), populate(Database(":memory:"))
+    for sql in WORKLOAD:
+        assert db.execute_query(sql) == plain.execute_query(sql)
+    for sql in ["SELECT * FROM items", "SELECT name FROM items WHERE grp=3", "SELECT * FROM items WHERE id=2000",
+                "SELECT COUNT(*), SUM(price), MAX(name) FROM items WHERE grp=1"]:
+        assert unordered(db.execute_query(sql)) == unordered(plain.execute_query(sql))
+    stats = db.buffer_pool.stats()
+    assert stats["resident_pages"] <= stats["capacity_pages"] < len(db.tables["items"].rows._pages)
+    assert stats["evictions"] > 0 and stats["writebacks"] > 0
+
+def test_point_lookup_reads_one_page(tmp_path):
+    db = populate(paged(tmp_path / "db"))
+    db.buffer_pool.flush()
+    db.execute_query("SELECT * FROM items")  # fill the pool with the last pages
+    before = db.buffer_pool.misses
+    assert db.execute_query("SELECT name FROM items WHERE id=3") == [{"name": "item3"}]
+    assert db.buffer_pool.misses - before == 1
+
+def test_rows_evicted_after_select(tmp_path):
+    table = populate(paged(tmp_path / "db")).tables["items"]
+    target = table.select({"grp": 2})
+    table.select()  # scanning everything evicts the pages `target` came from
+    assert table.update(target, {"price": -1.0}) == len(target)
+    assert sorted(r["id"] for r in table.select({"price": -1.0})) == [r["id"] for r in target]
+    stale = table.select({"price": -1.0})
+    table.select()
+    # The evicted copies are matched by value; duplicates are only counted once
+    assert table.delete(stale + stale[:1]) == len(target)
+    assert table.select({"grp": 2}) == []
+
+def test_rollback(tmp_path):
+    db = populate(paged(tmp_path / "db"))
+    before = db.execute_query("SELECT * FROM items")
+    db.execute_query("BEGIN")
+    for sql in WORKLOAD:
+        db.execute_query(sql)
+    assert db.execute_query("ROLLBACK") == "Transaction rolled back."
+    assert db.execute_query("SELECT * FROM items") == before
+    assert db.execute_query("SELECT name FROM items WHERE id=11") == [{"name": "item11"}]
+
+def test_delete_keeps_indexes_without_reading_pages(tmp_path):
+    db = populate(paged(tmp_path / "db"))
+    table = db.tables["items"]
+    before = table.snapshot()[1]
+    db.execute_query("SELECT * FROM items WHERE id=599")  # the last page is resident
+    misses = db.buffer_pool.misses
+    db.execute_query("BEGIN")
+    assert db.execute_query("DELETE FROM items WHERE id=598") == "Deleted 1 rows."
+    assert db.buffer_pool.misses == misses
+    assert table._primary_key_index[599] == 598 and 598 not in table._primary_key_index
+    assert db.execute_query("SELECT name FROM items WHERE id=599") == [{"name": "item599"}]
+    db.execute_query("ROLLBACK")
+    assert table._primary_key_index == before
+    assert db.execute_query("SELECT name FROM items WHERE id=598") == [{"name": "item598"}]
+
+def test_page_files_are_closed(tmp_path):
+    db = populate(paged(tmp_path / "db"))
+    db.execute_query("CREATE TABLE other (id INT)")
+    items, other = db.tables["items"].rows, db.tables["other"].rows
+    db.execute_query("BEGIN")
+    db.drop_table("items")
+    db.execute_query("ROLLBACK")  # the table is back and still readable
+    assert not items._file.closed and len(db.execute_query("SELECT * FROM items")) == 600
+    db.drop_table("items")
+    assert items._file.closed
+    assert all(owner is not items for owner, _ in db.buffer_pool._frames)
+    db.close()
+    assert other._file.closed
+
+def test_oversized_row_is_rejected(tmp_path):
+    db = paged(tmp_path / "db")
+    db.execute_query("CREATE TABLE wide (a FLOAT, b FLOAT)")
+    # STRING values are stored as dictionary codes, so only wide numbers can overflow a page
+    db.buffer_pool.page_size = 32
+    assert "too large" in db.execute_query("INSERT INTO wide (a, b) VALUES (1.123456789012, 2.123456789012)")
+    assert db.execute_query("INSERT INTO wide (a, b) VALUES (1.5, 2.5)") == "Row inserted."
+    assert "too large" in db.execute_query("UPDATE wide SET a=1.123456789012, b=2.123456789012")
+    assert db.execute_query("SELECT * FROM wide") == [{"a": 1.5, "b": 2.5}]
+
+def test_save_and_reload(tmp_path):
+    db = populate(paged(tmp_path / "db"))
+    db.execute_query("CREATE TABLE scratch (id INT)")
+    db.save()
+    for sql in WORKLOAD:
+        db.execute_query(sql)
+    db.drop_table("scratch")
+    db.execute_query("CREATE MATERIALIZED VIEW counts AS SELECT COUNT(*) FROM items")
+    db.save()
+    expected = db.execute_query("SELECT * FROM items")
+
+    # Changes after the last save have been written back to the page file,
+    # but never over pages the saved catalog points at
+    db.execute_query("DELETE FROM items WHERE grp=1")
+    db.execute_query("UPDATE items SET name='unsaved'")
+    db.buffer_pool.flush()
+
+    reloaded = paged(tmp_path / "db")
+    reloaded.load()
+    assert isinstance(reloaded.tables["items"], PagedTable)
+    assert reloaded.execute_query("SELECT * FROM items") == expected
+    assert reloaded.execute_query("SELECT * FROM counts") == [{"COUNT(*)": len(expected)}]
+    assert "Duplicate" in reloaded.execute_query("INSERT INTO items (id, name) VALUES (2000, 'dup')")
+    assert not any(name.startswith("scratch.") for name in os.listdir(tmp_path / "db"))
+
+def test_serializing_keeps_page_dictionaries(tmp_path):
+    db = populate(paged(tmp_path / "db"))
+    db.execute_query("DELETE FROM items WHERE grp=3")
+    table = db.tables["items"]
+    before = list(table._dictionaries["name"].values)
+    table.to_dict()  # e.g. for a replica snapshot
+    assert table._dictionaries["name"].values == before
+    db.buffer_pool.flush()
+    db.execute_query("SELECT * FROM items")  # cycle every page through the pool
+    assert db.execute_query("SELECT name FROM items WHERE id=599") == [{"name": "item599"}]
+
+def test_page_size_must_match(tmp_path):
+    populate(paged(tmp_path / "db"), n=10).save()
+    other = Database(str(tmp_path / "db"), layout="paged", page_size=2 * PAGE)
+    with pytest.raises(ValueError):
+        other.load()
+
+def test_pool_capacity():
+    assert BufferPool(10 * PAGE, PAGE).capacity == 10
+    assert BufferPool(0, PAGE).capacity == 2
@@ -0,0 +1,145 @@
+import pytest
+from src.db.core import Database
+from src.db.partition import ShardPool, partition_of
+from src.db.replication import Follower, Primary
+from src.parser.parser import SQLParser
+
+SCHEMA = [
+    "CREATE TABLE users (id INT PRIMARY KEY, name STRING, country STRING, score FLOAT)",
+    "CREATE TABLE orders (oid INT, user_id INT, amount INT)",
+]
+PARTITIONING = [" PARTITION BY HASH (id) PARTITIONS 3", " PARTITION BY HASH (user_id) PARTITIONS 3"]
+
+QUERIES = [
+    "SELECT * FROM users WHERE id=7",
+    "SELECT name FROM users WHERE country='c1'",
+    "SELECT COUNT(*), SUM(score), AVG(id), MIN(name), MAX(score) FROM users",
+    "SELECT COUNT(*), SUM(id) FROM users WHERE country='c2'",
+    "SELECT name, amount FROM users JOIN orders ON users.id = orders.user_id",
+    "SELECT name, amount FROM users JOIN orders ON users.id = orders.user_id WHERE id=4",
+    "SELECT COUNT(*), SUM(amount) FROM users JOIN orders ON users.id = orders.user_id",
+    "SELECT * FROM orders JOIN users ON orders.oid = users.id",
+]
+
+def populate(db, partitioned):
+    for sql, clause in zip(SCHEMA, PARTITIONING):
+        assert db.execute_query(sql + (clause if partitioned else "")).endswith("created.")
+    script = [f"INSERT INTO users (id, name, country, score) VALUES ({i}, 'u{i}', 'c{i % 3}', {i / 10})"
+              for i in range(30)]
+    script += [f"INSERT INTO orders (oid, user_id, amount) VALUES ({i}, {i % 12}, {i * 3})" for i in range(40)]
+    db.execute_query(";".join(script))
+    return db
+
+@pytest.fixture
+def dbs():
+    sharded = populate(Database(":memory:"), partitioned=True)
+    yield sharded, populate(Database(":memory:"), partitioned=False)
+    sharded.close()
+
+def unordered(rows):
+    return sorted(rows, key=lambda r: sorted(r.items(), key=str))
+
+def shards_used(monkeypatch):
+    calls = []
+    original = ShardPool.scatter
+    def scatter(self, requests):
+        calls.extend(shard for shard, _, _ in requests)
+        return original(self, requests)
+    monkeypatch.setattr(ShardPool, "scatter", scatter)
+    return calls
+
+def test_parse_partition_clause():
+    cmd = SQLParser().parse("CREATE TABLE t (id INT PRIMARY KEY, n STRING) PARTITION BY HASH (id) PARTITIONS 4")
+    assert (cmd.partition_key, cmd.partitions) == ("id", 4)
+    assert [c["name"] for c in cmd.columns] == ["id", "n"]
+    with pytest.raises(ValueError):
+        SQLParser().parse("CREATE TABLE t (id INT) PARTITION BY HASH (nope) PARTITIONS 2")
+
+def test_partition_of_is_stable():
+    assert partition_of("abc", 4) == partition_of("abc", 4)
+    assert partition_of(1, 4) == partition_of(1.0, 4) == partition_of(True, 4)
+
+@pytest.mark.parametrize("sql", QUERIES)
+def test_matches_unpartitioned(dbs, sql):
+    sharded, plain = dbs
+    assert unordered(sharded.execute_query(sql)) == unordered(plain.execute_query(sql))
+
+def test_point_query_uses_one_shard(dbs, monkeypatch):
+    sharded, _ = dbs
+    calls = shards_used(monkeypatch)
+    sharded.execute_query("SELECT * FROM users WHERE id=7")
+    assert calls == [partition_of(7, 3)]
+    calls.clear()
+    sharded.execute_query("SELECT * FROM users WHERE country='c1'")
+    assert sorted(calls) == [0, 1, 2]
+
+def test_writes_match_unpartitioned(dbs):
+    sharded, plain = dbs
+    for db in dbs:
+        assert db.execute_query("UPDATE users SET country='zz' WHERE country='c1'") == "Updated 10 rows."
+        assert db.execute_query("DELETE FROM orders WHERE user_id=3") == "Deleted 4 rows."
+        db.execute_query("INSERT INTO users (id, name, country, score) VALUES (100, 'new', 'zz', 1.5)")
+    for sql in ["SELECT * FROM users", "SELECT * FROM orders"]:
+        assert unordered(sharded.execute_query(sql)) == unordered(plain.execute_query(sql))
+
+def test_rollback_spans_shards(dbs):
+    sharded, _ = dbs
+    before = unordered(sharded.execute_query("SELECT * FROM users"))
+    sharded.execute_query("BEGIN")
+    sharded.execute_query("UPDATE users SET name='x'")
+    sharded.execute_query("DELETE FROM users WHERE country='c0'")
+    sharded.execute_query("INSERT INTO users (id, name, country, score) VALUES (100, 'new', 'zz', 1.5)")
+    assert sharded.execute_query("ROLLBACK") == "Transaction rolled back."
+    assert unordered(sharded.execute_query("SELECT * FROM users")) == before
+    # A failing script is undone on every shard it touched
+    assert sharded.execute_query("DELETE FROM orders; INSERT INTO users (id, name) VALUES (5, 'dup')").startswith("Error:")
+    assert sharded.execute_query("SELECT COUNT(*) FROM orders") == [{"COUNT(*)": 40}]
+
+def test_constraints(dbs):
+    sharded, _ = dbs
+    assert "Duplicate primary key" in sharded.execute_query("INSERT INTO users (id, name) VALUES (5, 'dup')")
+    assert sharded.execute_query("UPDATE users SET id=99 WHERE id=5").startswith("Error:")
+    assert sharded.execute_query(
+        "CREATE TABLE t (id INT PRIMARY KEY, k INT) PARTITION BY HASH (k) PARTITIONS 2").startswith("Error:")
+    assert sharded.execute_query("CREATE MATERIALIZED VIEW v AS SELECT * FROM users").startswith("Error:")
+
+def test_index_on_partitioned_table(dbs):
+    sharded, _ = dbs
+    assert sharded.execute_query("CREATE INDEX idx_country ON users (country) INCLUDE (name)") == "Index 'idx_country' created."
+    assert len(sharded.execute_query("SELECT name FROM users WHERE country='c1'")) == 10
+
+def test_metadata(dbs):
+    sharded, _ = dbs
+    meta = sharded.get_tables()["users"]
+    assert meta["rows_count"] == 30 and meta["partitions"] == 3 and meta["partition_key"] == "id"
+
+def test_persistence(tmp_path):
+    path = str(tmp_path / "db.json")
+    db = populate(Database(path), partitioned=True)
+    db.save()
+    db.execute_query("DELETE FROM users WHERE id=1")
+    db.save()
+    db.close()
+
+    reloaded = Database(path)
+    reloaded.load()
+    try:
+        assert reloaded.execute_query("SELECT COUNT(*) FROM users") == [{"COUNT(*)": 29}]
+        assert reloaded.execute_query("SELECT name FROM users WHERE id=7") == [{"name": "u7"}]
+        assert "Duplicate" in reloaded.execute_query("INSERT INTO users (id, name) VALUES (7, 'dup')")
+    finally:
+        reloaded.close()
+
+def test_replicated(dbs):
+    sharded, _ = dbs
+    primary = Primary(sharded, heartbeat_interval=0.05).start()
+    follower = Follower(primary.address).start()
+    try:
+        assert follower.wait_for(0, timeout=10)
+        sharded.execute_query("INSERT INTO users (id, name, country, score) VALUES (100, 'new', 'zz', 1.5)")
+        assert follower.wait_for(primary.log.last_lsn, timeout=10)
+        assert follower.db.execute_query("SELECT COUNT(*) FROM users") == [{"COUNT(*)": 31}]
+    finally:
+        follower.stop()
+        primary.stop()
+        follower.db.close()
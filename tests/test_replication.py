@@ -0,0 +1,193 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+import pytest
+from src.db.core import Database
+from src.db.replication import Follower, Primary, ReplicationLog
+from src.db.table import Column, ColumnType, Table
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+@pytest.fixture
+def primary():
+    db = Database(":memory:")
+    db.execute_query("CREATE TABLE users (id INT PRIMARY KEY, name STRING)")
+    db.execute_query("INSERT INTO users (id, name) VALUES (1, 'Alice')")
+    primary = Primary(db, heartbeat_interval=0.05).start()
+    yield primary
+    primary.stop()
+
+def start_follower(primary):
+    follower = Follower(primary.address, reconnect_delay=0.05).start()
+    assert follower.wait_for(primary.log.last_lsn, timeout=5)
+    return follower
+
+def test_log_records_committed_statements():
+    db = Database(":memory:")
+    db.replication_log = log = ReplicationLog()
+    db.execute_query("CREATE TABLE t (id INT PRIMARY KEY); INSERT INTO t (id) VALUES (1); SELECT * FROM t")
+    db.execute_query("BEGIN; INSERT INTO t (id) VALUES (2); ROLLBACK")
+    db.execute_query("BEGIN; INSERT INTO t (id) VALUES (3)")
+    db.execute_query("INSERT INTO t (id) VALUES (4); INSERT INTO t (id) VALUES (1)")  # fails, only this script undone
+    db.execute_query("UPDATE t SET id=5 WHERE id=42")  # no rows, nothing to replicate
+    db.execute_query("COMMIT")
+    assert [e.statements for e in log.entries_after(0)] == [
+        ["CREATE TABLE t (id INT PRIMARY KEY)", "INSERT INTO t (id) VALUES (1)"],
+        ["INSERT INTO t (id) VALUES (3)"],
+    ]
+
+def test_python_api_writes_are_replicated(primary):
+    follower = start_follower(primary)
+    try:
+        db = primary.db
+        db.create_table(Table("tags", [Column("id", ColumnType.INTEGER, is_primary=True), Column("tag", ColumnType.STRING)]))
+        db.execute_query("INSERT INTO tags (id, tag) VALUES (1, 'red')")
+        assert db.bulk_insert("users", [{"id": 2, "name": "Bob"}, {"id": 3, "name": "Carol"}]) == 2
+        db.execute_query("UPDATE users SET name='Robert' WHERE id=2")
+        db.execute_query("BEGIN")
+        db.drop_table("users")
+        db.execute_query("ROLLBACK")  # the drop is forgotten with the transaction
+        assert follower.wait_for(primary.log.last_lsn, timeout=5)
+        assert follower.db.execute_query("SELECT * FROM tags") == [{"id": 1, "tag": "red"}]
+        assert follower.db.execute_query("SELECT name FROM users") == \
+            [{"name": "Alice"}, {"name": "Robert"}, {"name": "Carol"}]
+
+        db.drop_table("tags")
+        assert follower.wait_for(primary.log.last_lsn, timeout=5)
+        assert "tags" not in follower.db.tables
+        with pytest.raises(ValueError, match="read-only"):
+            follower.db.drop_table("users")
+        assert follower.status()["lag_entries"] == 0
+    finally:
+        follower.stop()
+
+def test_log_retention():
+    log = ReplicationLog(retain=2)
+    for i in range(4):
+        log.append([f"stmt {i}"])
+    assert log.covers(2) and log.covers(4)
+    assert not log.covers(1) and not log.covers(5)
+    assert log.entries_after(1) is None
+    assert [e.lsn for e in log.entries_after(2)] == [3, 4]
+
+def test_follower_bootstraps_and_streams(primary):
+    follower = start_follower(primary)
+    try:
+        assert follower.db.execute_query("SELECT name FROM users WHERE id=1") == [{"name": "Alice"}]
+        db = primary.db
+        db.execute_query("INSERT INTO users (id, name) VALUES (2, 'Bob')")
+        db.execute_query("UPDATE users SET name='Alicia' WHERE id=1")
+        db.execute_query("CREATE MATERIALIZED VIEW named AS SELECT COUNT(*) FROM users")
+        db.execute_query("DELETE FROM users WHERE id=2")
+        assert follower.wait_for(primary.log.last_lsn, timeout=5)
+        assert follower.db.execute_query("SELECT * FROM users") == [{"id": 1, "name": "Alicia"}]
+        assert follower.db.execute_query("SELECT * FROM named") == [{"COUNT(*)": 1}]
+
+        status = follower.status()
+        assert status["connected"] and status["lag_entries"] == 0
+        assert status["applied_lsn"] == primary.log.last_lsn
+        assert primary.status()["followers"][0]["lag_entries"] == 0
+    finally:
+        follower.stop()
+
+def test_uncommitted_writes_are_not_shipped(primary):
+    db = primary.db
+    db.execute_query("BEGIN")
+    db.execute_query("INSERT INTO users (id, name) VALUES (2, 'Bob')")
+    follower = Follower(primary.address).start()
+    try:
+        # The snapshot waits for the open transaction
+        assert not follower.wait_for(0, timeout=0.2)
+        db.execute_query("COMMIT")
+        assert follower.wait_for(primary.log.last_lsn, timeout=5)
+        assert len(follower.db.execute_query("SELECT * FROM users")) == 2
+    finally:
+        follower.stop()
+
+def test_snapshot_times_out_on_open_transaction(primary):
+    db = primary.db
+    db.execute_query("BEGIN")
+    db.execute_query("INSERT INTO users (id, name) VALUES (2, 'Bob')")
+    primary.snapshot_timeout = 0.05
+    with pytest.raises(TimeoutError):
+        primary.snapshot()
+    db.execute_query("COMMIT")
+    assert primary.snapshot()[1]["users"]
+
+def test_followers_are_read_only(primary):
+    follower = start_follower(primary)
+    try:
+        assert follower.db.execute_query("INSERT INTO users (id, name) VALUES (9, 'x')").startswith("Error:")
+        assert follower.db.execute_query("DELETE FROM users").startswith("Error:")
+    finally:
+        follower.stop()
+
+def test_follower_resumes_from_log_tail(primary):
+    follower = start_follower(primary)
+    snapshots = []
+    original = primary.snapshot
+    primary.snapshot = lambda: snapshots.append(1) or original()
+    try:
+        follower._sock.shutdown(socket.SHUT_RDWR)  # drop the connection
+        primary.db.execute_query("INSERT INTO users (id, name) VALUES (2, 'Bob')")
+        assert follower.wait_for(primary.log.last_lsn, timeout=5)
+        assert len(follower.db.execute_query("SELECT * FROM users")) == 2
+        assert snapshots == []
+    finally:
+        follower.stop()
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def _post(url, sql):
+    req = urllib.request.Request(url, data=json.dumps({"query": sql}).encode(),
+                                 headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _poll(fn, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if fn():
+                return True
+        except OSError:
+            pass
+        time.sleep(0.1)
+    return False
+
+def test_replica_process(primary, tmp_path):
+    pytest.importorskip("flask")
+    port = _free_port()
+    host, repl_port = primary.address
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    proc = subprocess.Popen([sys.executable, "-m", "src.replica", "--primary", f"{host}:{repl_port}", "--port", str(port)],
+                            cwd=tmp_path, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        assert _poll(lambda: _get(f"{base}/api/replication")[0] == 200)
+        primary.db.execute_query("INSERT INTO users (id, name) VALUES (2, 'Bob')")
+        assert _poll(lambda: len(_post(f"{base}/api/query", "SELECT * FROM users")[1]["result"]) == 2)
+        status, body = _post(f"{base}/api/query", "INSERT INTO users (id, name) VALUES (3, 'x')")
+        assert status == 400 and "read-only" in body["error"]
+        assert _get(f"{base}/api/replication")[1]["applied_lsn"] == primary.log.last_lsn
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
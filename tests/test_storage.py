@@ -0,0 +1,136 @@
+import json
+import os
+from src.db.core import Database
+
+def make_db(path, **kwargs):
+    db = Database(str(path), layout="directory", **kwargs)
+    db.execute_query("CREATE TABLE orders (id INT PRIMARY KEY, amount INT)")
+    db.execute_query("CREATE TABLE audit (id INT PRIMARY KEY, note STRING)")
+    db.execute_query("INSERT INTO audit (id, note) VALUES (1, 'created')")
+    return db
+
+def table_files(path):
+    with open(os.path.join(path, "catalog.json")) as f:
+        return {name: entry["file"] for name, entry in json.load(f)["tables"].items()}
+
+def test_directory_layout_round_trip(tmp_path):
+    path = tmp_path / "db"
+    db = make_db(path)
+    db.execute_query("INSERT INTO orders (id, amount) VALUES (1, 50)")
+    db.save()
+
+    with open(os.path.join(path, "catalog.json")) as f:
+        entries = json.load(f)["tables"].values()
+    expected = ["catalog.json"] + [e["file"] for e in entries]
+    assert sorted(os.listdir(path)) == sorted(expected)
+
+    reloaded = Database(str(path), layout="directory")
+    reloaded.load()
+    assert reloaded.execute_query("SELECT * FROM orders") == [{"id": 1, "amount": 50}]
+    assert reloaded.execute_query("SELECT * FROM audit") == [{"id": 1, "note": "created"}]
+
+def test_only_dirty_tables_are_rewritten(tmp_path):
+    path = tmp_path / "db"
+    db = make_db(path)
+    db.save()
+    before = table_files(path)
+
+    db.execute_query("INSERT INTO orders (id, amount) VALUES (1, 50)")
+    db.save()
+    after = table_files(path)
+
+    assert after["audit"] == before["audit"]
+    assert after["orders"] != before["orders"]
+    # The superseded orders file is gone
+    assert before["orders"] not in os.listdir(path)
+
+def test_clean_save_writes_nothing(tmp_path):
+    path = tmp_path / "db"
+    db = make_db(path)
+    db.save()
+    mtime = os.stat(path / "catalog.json").st_mtime_ns
+    db.save()
+    assert os.stat(path / "catalog.json").st_mtime_ns == mtime
+
+def test_rolled_back_changes_still_count_as_dirty(tmp_path):
+    path = tmp_path / "db"
+    db = make_db(path)
+    db.save()
+    db.execute_query("BEGIN")
+    db.execute_query("INSERT INTO audit (id, note) VALUES (2, 'oops')")
+    db.execute_query("ROLLBACK")
+    db.save()
+
+    reloaded = Database(str(path), layout="directory")
+    reloaded.load()
+    assert len(reloaded.tables["audit"].rows) == 1
+
+def test_dropped_table_is_removed_from_catalog(tmp_path):
+    path = tmp_path / "db"
+    db = make_db(path)
+    db.save()
+    db.drop_table("audit")
+    db.save()
+    assert list(table_files(path)) == ["orders"]
+    assert len(os.listdir(path)) == 2  # catalog, table file
+
+def test_background_saves(tmp_path):
+    path = tmp_path / "db"
+    db = make_db(path, background_saves=True)
+    db.execute_query("INSERT INTO orders (id, amount) VALUES (1, 50)")
+    db.sync()
+    db.wait_for_saves()
+
+    reloaded = Database(str(path), layout="directory")
+    reloaded.load()
+    assert len(reloaded.tables["orders"].rows) == 1
+
+def test_background_syncs_coalesce_and_report_failures(tmp_path, monkeypatch):
+    import threading
+    import pytest
+    db = make_db(tmp_path / "db", background_saves=True)
+    gate, writes = threading.Event(), []
+    original = db._store.write
+
+    def slow_write(job):
+        writes.append(1)
+        gate.wait(5)
+        original(job)
+    monkeypatch.setattr(db._store, "write", slow_write)
+    for i in range(10):
+        db.execute_query(f"INSERT INTO orders (id, amount) VALUES ({i}, 1)")
+        db.sync()
+    gate.set()
+    db.wait_for_saves()
+    # The first save plus one follow-up covering the commits made while it ran
+    assert len(writes) <= 2
+
+    def broken_write(job):
+        raise OSError("disk full")
+    monkeypatch.setattr(db._store, "write", broken_write)
+    db.execute_query("INSERT INTO orders (id, amount) VALUES (100, 1)")
+    db.sync()
+    with pytest.raises(OSError, match="disk full"):
+        db.wait_for_saves()
+    db.execute_query("INSERT INTO orders (id, amount) VALUES (101, 1)")
+    db.sync()
+    db._writer.submit(lambda: None).result()
+    with pytest.raises(OSError, match="disk full"):
+        db.sync()  # the failure is reported once, by whoever asks next
+
+    monkeypatch.setattr(db._store, "write", original)
+    db.sync()
+    db.wait_for_saves()
+    reloaded = Database(str(tmp_path / "db"), layout="directory")
+    reloaded.load()
+    assert len(reloaded.tables["orders"].rows) == 12
+
+def test_single_file_layout_skips_clean_saves(tmp_path):
+    path = tmp_path / "db.json"
+    db = Database(str(path))
+    db.execute_query("CREATE TABLE t (id INT)")
+    db.save()
+    mtime = os.stat(path).st_mtime_ns
+    db.save()
+    assert os.stat(path).st_mtime_ns == mtime
+    assert not os.path.exists(f"{path}.tmp")
@@ -0,0 +1,174 @@
+import threading
+import pytest
+from src.db.core import Database
+from src.db.replication import ReplicationLog
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "txn.json"))
+    db.execute_query("CREATE TABLE users (id INT PRIMARY KEY, name STRING)")
+    return db
+
+def test_commit_keeps_changes(db):
+    assert db.execute_query("BEGIN") == "Transaction started."
+    db.execute_query("INSERT INTO users (id, name) VALUES (1, 'Alice')")
+    assert db.in_transaction
+    assert db.execute_query("COMMIT") == "Transaction committed."
+    assert not db.in_transaction
+    assert len(db.execute_query("SELECT * FROM users")) == 1
+
+def test_rollback_undoes_insert_update_delete(db):
+    db.execute_query("INSERT INTO users (id, name) VALUES (1, 'Alice')")
+    db.execute_query("INSERT INTO users (id, name) VALUES (2, 'Bob')")
+
+    db.execute_query("BEGIN")
+    db.execute_query("INSERT INTO users (id, name) VALUES (3, 'Carol')")
+    db.execute_query("UPDATE users SET name='Alicia' WHERE id=1")
+    db.execute_query("DELETE FROM users WHERE id=2")
+    db.execute_query("CREATE TABLE scratch (id INT)")
+    assert db.execute_query("ROLLBACK") == "Transaction rolled back."
+
+    rows = db.execute_query("SELECT * FROM users")
+    assert sorted((r['id'], r['name']) for r in rows) == [(1, 'Alice'), (2, 'Bob')]
+    assert "scratch" not in db.tables
+    # Indexes were restored too: re-inserting the rolled back key works,
+    # and the surviving keys are still enforced.
+    assert db.execute_query("INSERT INTO users (id, name) VALUES (3, 'Carol')") == "Row inserted."
+    assert db.execute_query("INSERT INTO users (id, name) VALUES (2, 'Bobby')").startswith("Error:")
+
+def test_failed_script_is_not_half_applied(db):
+    res = db.execute_query("""
+    INSERT INTO users (id, name) VALUES (1, 'Alice');
+    INSERT INTO users (id, name) VALUES (1, 'Duplicate');
+    """)
+    assert res.startswith("Error:")
+    assert db.execute_query("SELECT * FROM users") == []
+
+def test_error_inside_explicit_transaction_keeps_earlier_statements(db):
+    db.execute_query("BEGIN")
+    db.execute_query("INSERT INTO users (id, name) VALUES (1, 'Alice')")
+    assert db.execute_query("INSERT INTO users (id, name) VALUES (1, 'Again')").startswith("Error:")
+    assert db.in_transaction
+    db.execute_query("COMMIT")
+    assert len(db.execute_query("SELECT * FROM users")) == 1
+
+def test_commit_without_begin_is_an_error(db):
+    assert db.execute_query("COMMIT").startswith("Error:")
+    assert db.execute_query("ROLLBACK").startswith("Error:")
+
+def test_autocommit_scripts_cannot_leave_a_transaction_open(db):
+    sql = "BEGIN; INSERT INTO users (id, name) VALUES (1, 'Alice')"
+    assert "must be in the same script" in db.execute_query(sql, autocommit=True)
+    assert not db.in_transaction and db.execute_query("SELECT * FROM users") == []
+    script = "BEGIN; INSERT INTO users (id, name) VALUES (1, 'Alice'); COMMIT"
+    assert db.execute_query(script, autocommit=True)[-1] == "Transaction committed."
+    # Nor join a transaction someone else has open
+    db.execute_query("BEGIN")
+    assert "Another session" in db.execute_query("DELETE FROM users", autocommit=True)
+    db.execute_query("ROLLBACK")
+    assert len(db.execute_query("SELECT * FROM users")) == 1
+
+@pytest.mark.parametrize("autocommit", [False, True])
+def test_begin_after_writes_fails_the_script(db, autocommit):
+    db.replication_log = log = ReplicationLog()
+    sql = "INSERT INTO users (id, name) VALUES (1, 'Alice'); BEGIN; INSERT INTO users (id, name) VALUES (2, 'Bob')"
+    assert "BEGIN must come before any writes" in db.execute_query(sql, autocommit=autocommit)
+    assert not db.in_transaction and db.execute_query("SELECT * FROM users") == []
+    assert log.last_lsn == 0
+    # Reads before BEGIN are fine
+    assert db.execute_query("SELECT * FROM users; BEGIN; ROLLBACK", autocommit=autocommit)[-1] == \
+        "Transaction rolled back."
+
+def test_persistence_deferred_until_commit(db):
+    db.sync()
+    db.execute_query("BEGIN")
+    db.execute_query("INSERT INTO users (id, name) VALUES (1, 'Alice')")
+    with pytest.raises(ValueError):
+        db.save()
+    db.sync()  # nothing committed yet, so nothing is written
+
+    reloaded = Database(db.persistence_file)
+    reloaded.load()
+    assert reloaded.tables["users"].rows == []
+
+    db.execute_query("COMMIT")
+    db.sync()
+    reloaded = Database(db.persistence_file)
+    reloaded.load()
+    assert len(reloaded.tables["users"].rows) == 1
+
+def test_bulk_script_costs_one_flush(db, monkeypatch):
+    saves = []
+    original_save = db.save
+    monkeypatch.setattr(db, "save", lambda: saves.append(1) or original_save())
+
+    script = ";".join(f"INSERT INTO users (id, name) VALUES ({i}, 'u{i}')" for i in range(500))
+    db.execute_query(script)
+    db.sync()
+    db.sync()
+    assert len(saves) == 1
+
+def test_concurrent_committers_share_flush(db, monkeypatch):
+    saves = []
+    original_save = db.save
+    gate = threading.Event()
+
+    def slow_save():
+        saves.append(1)
+        gate.wait(5)
+        return original_save()
+    monkeypatch.setattr(db, "save", slow_save)
+
+    db.execute_query("INSERT INTO users (id, name) VALUES (0, 'first')")
+    leader = threading.Thread(target=db.sync)
+    leader.start()
+    while not saves:
+        pass
+
+    # These commit while the leader is still writing; one follow-up flush covers them all.
+    followers = []
+    for i in range(1, 6):
+        db.execute_query(f"INSERT INTO users (id, name) VALUES ({i}, 'u{i}')")
+        t = threading.Thread(target=db.sync)
+        t.start()
+        followers.append(t)
+    gate.set()
+    leader.join()
+    for t in followers:
+        t.join()
+
+    # Six commits, but at most the leader's flush plus one shared follow-up
+    assert len(saves) <= 2
+    reloaded = Database(db.persistence_file)
+    reloaded.load()
+    assert len(reloaded.tables["users"].rows) == 6
+
+def _state(table):
+    return ([dict(r) for r in table.rows], dict(table._primary_key_index),
+            {c: dict(i) for c, i in table._unique_indices.items()},
+            {n: {k: sorted(v) for k, v in i.entries.items()} for n, i in table._secondary_indexes.items()})
+
+@pytest.mark.parametrize("seed", range(5))
+def test_undo_log_restores_rows_and_indexes(seed):
+    import random
+    rng = random.Random(seed)
+    db = Database(":memory:")
+    db.execute_query("CREATE TABLE t (id INT PRIMARY KEY, code STRING UNIQUE, grp INT)")
+    db.execute_query(";".join(f"INSERT INTO t (id, code, grp) VALUES ({i}, 'c{i}', {i % 5})" for i in range(60)))
+    db.execute_query("CREATE INDEX by_grp ON t (grp) INCLUDE (code)")
+    table = db.tables["t"]
+    before = _state(table)
+    for commit in (False, True):
+        db.execute_query("BEGIN")
+        for step in range(8):
+            i = rng.randrange(80)
+            db.execute_query(rng.choice([f"DELETE FROM t WHERE grp={i % 5}", f"DELETE FROM t WHERE id={i}",
+                                         f"UPDATE t SET grp={i % 7} WHERE grp={i % 5}",
+                                         f"UPDATE t SET code='n{step}' WHERE id={i}",
+                                         f"INSERT INTO t (id, code, grp) VALUES ({100 + step}, 'x{step}', 1)"]))
+        db.execute_query("COMMIT" if commit else "ROLLBACK")
+        if not commit:
+            assert _state(table) == before
+    after = _state(table)
+    table.rebuild_indexes()
+    assert _state(table) == after
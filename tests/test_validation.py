@@ -0,0 +1,77 @@
+import pytest
+from src.db.core import Database
+from src.db.table import Column, ColumnType, Table
+from src.db.validation import compile_schema
+
+def columns():
+    return [
+        Column("id", ColumnType.INTEGER, is_primary=True),
+        Column("name", ColumnType.STRING, nullable=False),
+        Column("email", ColumnType.STRING, is_unique=True),
+        Column("score", ColumnType.FLOAT),
+    ]
+
+@pytest.fixture
+def db():
+    db = Database(":memory:")
+    db.execute_query("CREATE TABLE users (id INT PRIMARY KEY, name STRING NOT NULL, email STRING UNIQUE, score FLOAT)")
+    db.execute_query("INSERT INTO users (id, name, email) VALUES (1, 'Alice', 'a@x')")
+    db.execute_query("INSERT INTO users (id, name, email) VALUES (2, 'Bob', 'b@x')")
+    return db
+
+def test_one_compiled_schema_per_distinct_schema():
+    assert Table("a", columns())._compiled is Table("b", columns())._compiled
+    assert Table("c", columns()[:2])._compiled is not Table("a", columns())._compiled
+    assert "def validate(table, row_data):" in compile_schema(columns()).source
+
+def test_insert_checks():
+    t = Table("users", columns())
+    t.insert({"id": 1, "name": "Alice", "email": "a@x", "extra": "ignored"})
+    assert t.rows == [{"id": 1, "name": "Alice", "email": "a@x", "score": None}]
+    assert t.rows[0]["name"] is t._dictionaries["name"].lookup("Alice")
+    cases = [
+        ({"id": "1", "name": "x"}, TypeError, "Column 'id' expected INTEGER, got <class 'str'>"),
+        ({"id": 2, "name": 5}, TypeError, "Column 'name' expected STRING, got <class 'int'>"),
+        ({"id": 2}, ValueError, "Column 'name' cannot be null"),
+        ({"id": 1, "name": "x"}, ValueError, "Duplicate primary key '1' for column 'id'"),
+        ({"id": 2, "name": "x", "email": "a@x"}, ValueError, "Duplicate unique value 'a@x' for column 'email'"),
+    ]
+    for row, error, message in cases:
+        with pytest.raises(error) as excinfo:
+            t.insert(row)
+        assert str(excinfo.value) == message
+    assert len(t.rows) == 1 and set(t._primary_key_index) == {1} and set(t._unique_indices["email"]) == {"a@x"}
+
+def test_update_checks(db):
+    assert db.execute_query("UPDATE users SET score='high' WHERE id=1") == "Updated 1 rows."  # FLOAT is unchecked
+    assert "expected INTEGER" in db.execute_query("UPDATE users SET id='x' WHERE id=1")
+    users = db.tables["users"]
+    with pytest.raises(ValueError, match="cannot be null"):
+        users.update(users.select({"id": 1}), {"name": None})
+    assert "Duplicate primary key '2'" in db.execute_query("UPDATE users SET id=2 WHERE id=1")
+    assert "Duplicate unique value 'c@x'" in db.execute_query("UPDATE users SET email='c@x'")
+    assert db.execute_query("UPDATE users SET email='a@x' WHERE id=1") == "Updated 1 rows."
+    assert db.execute_query("UPDATE users SET id=7 WHERE id=1") == "Updated 1 rows."
+    assert db.execute_query("SELECT name FROM users WHERE id=7") == [{"name": "Alice"}]
+    assert db.execute_query("SELECT name FROM users WHERE id=1") == []
+
+def test_insert_many_is_all_or_nothing():
+    t = Table("users", columns())
+    assert t.insert_many({"id": i, "name": f"u{i}"} for i in range(3)) == 3
+    with pytest.raises(ValueError):
+        t.insert_many([{"id": 3, "name": "ok"}, {"id": 4, "name": "ok"}, {"id": 3, "name": "dup"}])
+    assert [r["id"] for r in t.rows] == [0, 1, 2] and set(t._primary_key_index) == {0, 1, 2}
+
+def test_bulk_insert(db):
+    db.execute_query("CREATE MATERIALIZED VIEW total AS SELECT COUNT(*) FROM users")
+    assert db.bulk_insert("users", [{"id": i, "name": f"u{i}"} for i in range(10, 20)]) == 10
+    assert db.execute_query("SELECT * FROM total") == [{"COUNT(*)": 12}]
+    db.execute_query("BEGIN")
+    db.bulk_insert("users", [{"id": 30, "name": "later"}])
+    db.execute_query("ROLLBACK")
+    assert db.execute_query("SELECT COUNT(*) FROM users") == [{"COUNT(*)": 12}]
+    with pytest.raises(TypeError):
+        db.bulk_insert("users", [{"id": 40, "name": "ok"}, {"id": "bad", "name": "x"}])
+    assert db.execute_query("SELECT * FROM users WHERE id=40") == []
+    with pytest.raises(ValueError):
+        db.bulk_insert("total", [{"COUNT(*)": 1}])
@@ -0,0 +1,130 @@
+import math
+import random
+import pytest
+from src.db import vectorized
+from src.db.core import Database
+from src.parser.parser import SQLParser
+
+QUERIES = [
+    "SELECT * FROM sales WHERE qty=7",
+    "SELECT * FROM sales WHERE price=2.5",
+    "SELECT COUNT(*), COUNT(price), SUM(qty), AVG(qty), MIN(qty), MAX(qty) FROM sales",
+    "SELECT SUM(price), AVG(price), MIN(price), MAX(price) FROM sales",
+    "SELECT COUNT(*), SUM(price), MAX(qty) FROM sales WHERE qty=3",
+    "SELECT SUM(qty) FROM sales WHERE qty=12345",
+]
+
+def make_db(rows=3000):
+    db = Database(":memory:")
+    db.execute_query("CREATE TABLE sales (id INT PRIMARY KEY, qty INT, price FLOAT, region STRING)")
+    rng = random.Random(7)
+    script = []
+    for i in range(rows):
+        price = "NULL" if i % 11 == 0 else rng.choice(["2.5", "0.1", "3", "19.99"])
+        script.append(f"INSERT INTO sales (id, qty, price, region) VALUES ({i}, {rng.randrange(20)}, {price}, 'r{i % 4}')")
+    db.execute_query(";".join(script))
+    # The parser has no NULL literal; null out the marker rows directly
+    table = db.tables["sales"]
+    for row in table.rows:
+        if row["price"] == "NULL":
+            row["price"] = None
+    table.touch()
+    return db
+
+def run_both(db, sql, monkeypatch):
+    monkeypatch.setattr(vectorized, "ENABLED", False)
+    expected = db.execute_query(sql)
+    monkeypatch.setattr(vectorized, "ENABLED", True)
+    db.execute_query(sql)  # buffers are built on the second read of an unchanged table
+    actual = db.execute_query(sql)
+    return expected, actual
+
+def test_where_parses_numeric_literals():
+    assert SQLParser().parse("SELECT * FROM t WHERE price=2.5 AND qty=3 AND code='x1'").where == \
+        {"price": 2.5, "qty": 3, "code": "x1"}
+    assert SQLParser().parse("SELECT * FROM t WHERE name=nan").where == {"name": "nan"}
+
+def test_parse_aggregates():
+    cmd = SQLParser().parse("SELECT count(*), SUM(amount) FROM orders WHERE id=1")
+    assert cmd.aggregates == [
+        {"func": "COUNT", "column": "*", "label": "COUNT(*)"},
+        {"func": "SUM", "column": "amount", "label": "SUM(amount)"},
+    ]
+    assert SQLParser().parse("SELECT id FROM orders").aggregates is None
+
+def test_mixing_aggregates_and_columns_is_an_error():
+    db = Database(":memory:")
+    db.execute_query("CREATE TABLE t (id INT)")
+    assert db.execute_query("SELECT id, SUM(id) FROM t").startswith("Error:")
+
+def test_python_aggregates_on_small_table():
+    db = Database(":memory:")
+    db.execute_query("CREATE TABLE t (id INT, amount FLOAT)")
+    assert db.execute_query("SELECT COUNT(*), SUM(amount) FROM t") == [{"COUNT(*)": 0, "SUM(amount)": None}]
+    db.execute_query("INSERT INTO t (id, amount) VALUES (1, 0.1)")
+    db.execute_query("INSERT INTO t (id, amount) VALUES (2, 0.2)")
+    res = db.execute_query("SELECT SUM(amount), AVG(id), MAX(amount) FROM t")
+    assert res == [{"SUM(amount)": math.fsum([0.1, 0.2]), "AVG(id)": 1.5, "MAX(amount)": 0.2}]
+
+def test_aggregates_over_join():
+    db = Database(":memory:")
+    db.execute_query("CREATE TABLE users (id INT PRIMARY KEY, name STRING)")
+    db.execute_query("CREATE TABLE orders (oid INT PRIMARY KEY, user_id INT, amount INT)")
+    db.execute_query("INSERT INTO users (id, name) VALUES (1, 'Alice')")
+    db.execute_query("INSERT INTO orders (oid, user_id, amount) VALUES (10, 1, 5)")
+    db.execute_query("INSERT INTO orders (oid, user_id, amount) VALUES (11, 1, 7)")
+    res = db.execute_query("SELECT COUNT(*), SUM(amount) FROM users JOIN orders ON users.id = orders.user_id")
+    assert res == [{"COUNT(*)": 2, "SUM(amount)": 12}]
+
+@pytest.mark.parametrize("sql", QUERIES)
+def test_vectorized_matches_python(sql, monkeypatch):
+    pytest.importorskip("numpy")
+    db = make_db()
+    expected, actual = run_both(db, sql, monkeypatch)
+    assert actual == expected
+    # Same types too (int vs float matters for JSON output)
+    if sql.startswith("SELECT *"):
+        assert [r["id"] for r in actual] == [r["id"] for r in expected]
+    else:
+        assert {k: type(v) for k, v in actual[0].items()} == {k: type(v) for k, v in expected[0].items()}
+
+def test_vectorized_path_is_used(monkeypatch):
+    pytest.importorskip("numpy")
+    db = make_db()
+    calls = []
+    original = vectorized.equality_mask
+    monkeypatch.setattr(vectorized, "equality_mask", lambda *a: calls.append(1) or original(*a))
+    db.execute_query("SELECT * FROM sales WHERE price=2.5")
+    assert not calls
+    rows = db.execute_query("SELECT * FROM sales WHERE price=2.5")
+    assert calls and rows and all(r["price"] == 2.5 for r in rows)
+
+def test_buffers_are_refreshed_after_writes(monkeypatch):
+    pytest.importorskip("numpy")
+    db = make_db()
+    builds = []
+    original = vectorized.build_buffer
+    monkeypatch.setattr(vectorized, "build_buffer", lambda *a: builds.append(1) or original(*a))
+    for _ in range(2):
+        assert db.execute_query("SELECT COUNT(*) FROM sales WHERE qty=99") == [{"COUNT(*)": 0}]
+    assert len(builds) == 1
+    db.execute_query("UPDATE sales SET qty=99 WHERE id=5")
+    # The first read after a write scans in Python instead of rebuilding
+    assert db.execute_query("SELECT COUNT(*) FROM sales WHERE qty=99") == [{"COUNT(*)": 1}]
+    assert len(builds) == 1
+    assert db.execute_query("SELECT COUNT(*) FROM sales WHERE qty=99") == [{"COUNT(*)": 1}]
+    assert len(builds) == 2
+
+def test_unrepresentable_columns_fall_back(monkeypatch):
+    pytest.importorskip("numpy")
+    db = make_db()
+    db.tables["sales"].rows[0]["qty"] = 1 << 70  # beyond int64
+    db.tables["sales"].touch()
+    expected, actual = run_both(db, "SELECT SUM(qty), MAX(qty) FROM sales", monkeypatch)
+    assert actual == expected
+    assert actual[0]["MAX(qty)"] == 1 << 70
+
+def test_missing_numpy_falls_back(monkeypatch):
+    db = make_db(200)
+    monkeypatch.setattr(vectorized, "ENABLED", False)
+    assert len(db.execute_query("SELECT * FROM sales WHERE qty=3")) > 0